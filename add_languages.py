@@ -1,102 +1,94 @@
 #!/usr/bin/env python3
 """
-Script to add Python and Java as coding languages to the database
+Script to add coding languages to the database
+
+Without arguments it adds Python and Java. With --file it loads every row of
+a CSV (name,is_static,creator header) or JSONL file in one transaction.
+
+Usage:
+    python add_languages.py
+    python add_languages.py --file languages.csv
 """
+import argparse
+import asyncio
 import os
-import psycopg2
-from psycopg2.extras import RealDictCursor
-from dotenv import load_dotenv
 
-# Load environment variables
-load_dotenv()
+import db
+from language_repository import LanguageInput, count_languages, insert_languages_bulk, parse_language_payload
+
+# Languages added when no file is given
+DEFAULT_LANGUAGES = [
+    LanguageInput(
+        name="Python",
+        is_static=False,  # Python is dynamically typed
+        creator="Python Software Foundation"
+    ),
+    LanguageInput(
+        name="Java",
+        is_static=True,   # Java is statically typed
+        creator="Oracle Corporation"
+    ),
+]
+
+
+async def _insert(rows):
+    try:
+        async with db.get_db_connection() as conn:
+            inserted, conflicts = await insert_languages_bulk(conn, rows)
+            total = await count_languages(conn)
+    finally:
+        await db.close_pool()
+    return inserted, conflicts, total
 
-def add_coding_languages():
-    """Add Python and Java to the coding languages database"""
 
-    print("🐍 Adding Python and Java to Database")
-    print("=" * 40)
+def add_coding_languages(languages=None, path=None):
+    """Add languages from a list or a CSV/JSONL file in a single bulk insert"""
 
-    # Database configuration
-    DB_HOST = os.environ.get('DB_HOST')
-    DB_PORT = os.environ.get('DB_PORT')
-    DB_NAME = os.environ.get('DB_NAME')
-    DB_USER = os.environ.get('DB_USER')
-    DB_PASSWORD = os.environ.get('DB_PASSWORD')
+    print("🐍 Adding coding languages to Database")
+    print("=" * 40)
 
-    if not DB_PASSWORD:
+    if not db.DB_PASSWORD:
         print("❌ DB_PASSWORD not configured")
         return False
 
-    try:
-        # Connect to database
-        conn = psycopg2.connect(
-            host=DB_HOST,
-            port=DB_PORT,
-            database=DB_NAME,
-            user=DB_USER,
-            password=DB_PASSWORD,
-            cursor_factory=RealDictCursor
-        )
-        cursor = conn.cursor()
-
-        # Languages to add
-        languages = [
-            {
-                "name": "Python",
-                "is_static": False,  # Python is dynamically typed
-                "creator": "Python Software Foundation"
-            },
-            {
-                "name": "Java",
-                "is_static": True,   # Java is statically typed
-                "creator": "Oracle Corporation"
-            }
-        ]
-
-        print("Adding languages:")
-
-        for lang in languages:
-            # Insert language
-            insert_query = """
-                INSERT INTO "codingLanguage" (name, "isStatic", creator)
-                VALUES (%s, %s, %s)
-                RETURNING id;
-            """
-
-            cursor.execute(insert_query, (lang["name"], lang["is_static"], lang["creator"]))
-            result = cursor.fetchone()
-            language_id = result['id']
-
-            type_str = "Static" if lang["is_static"] else "Dynamic"
-            print(f"✅ {lang['name']}: ID {language_id} | {type_str} | Creator: {lang['creator']}")
-
-        # Commit changes
-        conn.commit()
-
-        # Show all entries
-        print("\n📋 All coding language entries:")
-        cursor.execute('SELECT id, name, "isStatic", creator FROM "codingLanguage" ORDER BY id;')
-        all_languages = cursor.fetchall()
-
-        for lang in all_languages:
-            type_str = "Static" if lang['isStatic'] else "Dynamic"
-            print(f"   ID: {lang['id']} | {lang['name']} | Type: {type_str} | Creator: {lang['creator']}")
-
-        cursor.close()
-        conn.close()
-
-        print(f"\n✅ Successfully added {len(languages)} coding languages!")
-        print(f"✅ Total entries in database: {len(all_languages)}")
-
-        return True
-
-    except psycopg2.Error as e:
-        print(f"❌ Database error: {str(e)}")
+    errors = []
+    if path:
+        payload_format = "csv" if path.lower().endswith(".csv") else "jsonl"
+        with open(path, encoding="utf-8") as f:
+            rows, errors = parse_language_payload(f.read(), payload_format)
+        print(f"Loading {len(rows)} languages from {os.path.basename(path)} ({payload_format})")
+    else:
+        rows = list(enumerate(languages or DEFAULT_LANGUAGES, 1))
+
+    for row, message in errors:
+        print(f"⚠️  Row {row} skipped: {message}")
+
+    if not rows:
+        print("❌ Nothing to add")
         return False
+
+    try:
+        inserted, conflicts, total = asyncio.run(_insert(rows))
     except Exception as e:
-        print(f"❌ Unexpected error: {str(e)}")
+        print(f"❌ Database error: {str(e)}")
         return False
 
+    ids = dict(inserted)
+    # Only echo every row for small loads
+    if len(rows) <= 20:
+        for row, lang in rows:
+            type_str = "Static" if lang.is_static else "Dynamic"
+            status = f"ID {ids[row]}" if row in ids else "already exists"
+            print(f"✅ {lang.name}: {status} | {type_str} | Creator: {lang.creator}")
+
+    if conflicts:
+        print(f"⚠️  {len(conflicts)} rows already existed and were skipped")
+
+    print(f"\n✅ Successfully added {len(inserted)} coding languages!")
+    print(f"✅ Total entries in database: {total}")
+
+    return True
+
 def test_mcp_tools():
     """Show how to test the MCP tools in Cursor"""
 
@@ -114,11 +106,17 @@ def test_mcp_tools():
     print("- Plus any additional entries you add via MCP tools")
 
 if __name__ == "__main__":
-    success = add_coding_languages()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--file", help="CSV or JSONL file of languages to add")
+    args = parser.parse_args()
+
+    success = add_coding_languages(path=args.file)
 
-    if success:
+    if success and not args.file:
         test_mcp_tools()
         print("\n🎉 Python and Java successfully added to database!")
         print("🚀 Ready to test MCP tools in Cursor!")
+    elif success:
+        print("\n🎉 Languages successfully added to database!")
     else:
         print("\n❌ Failed to add languages. Check database connection.")
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Per-call cost of the codingLanguage queries, prepared vs unprepared
+
+Runs every query from language_repository twice: on a connection with
+asyncpg's statement cache disabled (parse + plan on every call) and on one
+with it enabled (prepared once, then only bind + execute). The insert is the
+one add_coding_language runs, with a new name on every call, in a
+transaction that is rolled back, so the table is left unchanged.
+
+Usage:
+    DB_PASSWORD=... python benchmark_queries.py [--iterations 2000]
+"""
+import argparse
+import asyncio
+import itertools
+import statistics
+import time
+
+import asyncpg
+
+import db
+import language_repository as repo
+
+
+def _workloads(features):
+    """(label, coroutine function taking a connection) for each registry query"""
+    # INSERT_LANGUAGE_IDEMPOTENT needs the unique name index from migration 2
+    insert = repo.INSERT_LANGUAGE_IDEMPOTENT if features["name_index"] else repo.INSERT_LANGUAGE
+    names = (f"bench-{n}" for n in itertools.count())
+    page_query, page_args = repo.build_language_query(limit=100)
+    filtered_query, filtered_args = repo.build_language_query(after_id=0, limit=20, creator="system", name_prefix="py")
+    return [
+        ("table exists", lambda conn: conn.fetchval(repo.TABLE_EXISTS)),
+        ("count", lambda conn: conn.fetchval(repo.COUNT_LANGUAGES)),
+        ("list page (100 rows)", lambda conn: conn.fetch(page_query, *page_args)),
+        ("list filtered", lambda conn: conn.fetch(filtered_query, *filtered_args)),
+        ("insert", lambda conn: conn.fetchrow(insert, next(names), False, "benchmark")),
+    ]
+
+
+async def time_calls(conn, call, iterations):
+    """Per-call latencies in microseconds, after one warm-up call"""
+    await call(conn)
+    latencies = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        await call(conn)
+        latencies.append((time.perf_counter() - start) * 1e6)
+    return latencies
+
+
+async def connect(statement_cache_size):
+    return await asyncpg.connect(
+        host=db.DB_HOST,
+        port=int(db.DB_PORT),
+        database=db.DB_NAME,
+        user=db.DB_USER,
+        password=db.DB_PASSWORD,
+        statement_cache_size=statement_cache_size,
+    )
+
+
+async def run_benchmark(iterations):
+    print("🧮 Prepared Statement Benchmark")
+    print("=" * 40)
+    print(f"Database: {db.DB_HOST}:{db.DB_PORT}/{db.DB_NAME}")
+    print(f"Iterations per query: {iterations}\n")
+
+    unprepared = await connect(statement_cache_size=0)
+    prepared = await connect(statement_cache_size=db.DB_STATEMENT_CACHE_SIZE)
+    try:
+        await repo.check_schema(prepared)
+        features = await repo.schema_features(prepared)
+        print(f"{'query':<22} {'unprepared':>12} {'prepared':>12} {'saved':>10}")
+        for label, call in _workloads(features):
+            results = {}
+            for name, conn in (("unprepared", unprepared), ("prepared", prepared)):
+                # Inserts are rolled back so repeated runs do not grow the table
+                transaction = conn.transaction()
+                await transaction.start()
+                try:
+                    results[name] = statistics.median(await time_calls(conn, call, iterations))
+                finally:
+                    await transaction.rollback()
+            saved = results["unprepared"] - results["prepared"]
+            print(f"{label:<22} {results['unprepared']:>10.0f}µs {results['prepared']:>10.0f}µs "
+                  f"{saved:>8.0f}µs ({saved / results['unprepared']:.0%})")
+    finally:
+        await unprepared.close()
+        await prepared.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    if not db.DB_PASSWORD:
+        print("❌ DB_PASSWORD not configured")
+        raise SystemExit(1)
+
+    asyncio.run(run_benchmark(args.iterations))
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Latency of search_coding_languages queries on a large "codingLanguage" table
+
+Applies pending migrations, seeds the table with generated languages (1M by
+default) plus a few well-known ones, runs ANALYZE, and times the search
+query for prefix, word, creator and misspelled lookups. The seed rows are
+inserted in a transaction that is rolled back, so the table is left
+unchanged. Fuzzy matches need the pg_trgm extension on the server.
+
+Usage:
+    python local_services.py -- python benchmark_search.py
+    DB_PASSWORD=... python benchmark_search.py [--rows 1000000] [--iterations 200]
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import db
+import language_repository as repo
+import migrations
+
+# Letters-only pseudo-words, made unique by the row number; one row in a
+# hundred gets a well-known creator
+SEED_LANGUAGES = """
+    INSERT INTO "codingLanguage" (name, "isStatic", creator)
+    SELECT initcap(translate(substr(md5(g::text), 1, 5 + g % 6), '0123456789', 'ghijklmnop')) || g,
+           g % 3 = 0,
+           CASE WHEN g % 100 = 0
+                THEN (ARRAY['Microsoft', 'Google', 'Oracle', 'Mozilla', 'Apple', 'JetBrains', 'Meta', 'IBM'])[1 + g / 100 % 8]
+                ELSE 'creator ' || g % 10000 END
+    FROM generate_series(1, $1) AS g;
+"""
+
+# Languages such as "Python" may already exist, e.g. seeded by add_languages.py
+INSERT_KNOWN_LANGUAGE = """
+    INSERT INTO "codingLanguage" (name, "isStatic", creator)
+    VALUES ($1, $2, $3)
+    ON CONFLICT DO NOTHING;
+"""
+
+KNOWN_LANGUAGES = [
+    ("Python", False, "Guido van Rossum"),
+    ("TypeScript", True, "Microsoft"),
+    ("C#", True, "Microsoft"),
+    ("F#", True, "Microsoft"),
+    ("Go", True, "Google"),
+    ("Kotlin", True, "JetBrains"),
+    ("Rust", True, "Mozilla"),
+    ("Swift", True, "Apple"),
+]
+
+SEARCHES = [
+    ("short prefix", "k"),
+    ("short prefix", "ko"),
+    ("prefix", "pyth"),
+    ("exact name", "python"),
+    ("creator", "microsoft"),
+    ("creator words", "guido rossum"),
+    ("misspelled", "typscript"),
+    ("no match", "qqqq"),
+]
+
+
+async def time_search(conn, query, limit, iterations):
+    """Per-call latencies in milliseconds, after one warm-up call, and the match count"""
+    records = await repo.search_languages(conn, query, limit)
+    latencies = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        await repo.search_languages(conn, query, limit)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies, len(records)
+
+
+async def run_benchmark(rows, iterations, limit):
+    print("🔎 Search Benchmark")
+    print("=" * 40)
+    print(f"Database: {db.DB_HOST}:{db.DB_PORT}/{db.DB_NAME}")
+
+    try:
+        async with db.get_db_connection() as conn:
+            await migrations.migrate(conn)
+            await repo.check_schema(conn)
+            features = await repo.schema_features(conn)
+            print(f"Fuzzy matching: {'on' if features['trigram_index'] else 'off (pg_trgm not installed)'}")
+
+            transaction = conn.transaction()
+            await transaction.start()
+            try:
+                start = time.perf_counter()
+                await conn.execute(SEED_LANGUAGES, rows)
+                await conn.executemany(INSERT_KNOWN_LANGUAGE, KNOWN_LANGUAGES)
+                await conn.execute('ANALYZE "codingLanguage";')
+                print(f"Seeded {rows} rows in {time.perf_counter() - start:.1f}s; {iterations} calls per query\n")
+
+                print(f"{'search':<16} {'query':<14} {'matches':>8} {'median':>10} {'p95':>10}")
+                for label, query in SEARCHES:
+                    latencies, matches = await time_search(conn, query, limit, iterations)
+                    print(f"{label:<16} {query:<14} {matches:>8} {statistics.median(latencies):>8.2f}ms "
+                          f"{statistics.quantiles(latencies, n=20)[-1]:>8.2f}ms")
+            finally:
+                await transaction.rollback()
+    finally:
+        await db.close_pool()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000, help="generated rows to seed")
+    parser.add_argument("--iterations", type=int, default=200, help="timed calls per query")
+    parser.add_argument("--limit", type=int, default=20, help="matches per search, as the tool's limit")
+    args = parser.parse_args()
+
+    if not db.DB_PASSWORD:
+        print("❌ DB_PASSWORD not configured")
+        raise SystemExit(1)
+
+    asyncio.run(run_benchmark(args.rows, args.iterations, args.limit))
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Payload size and serialization time of a list_coding_languages page
+
+Builds a page of synthetic rows and serializes it two ways:
+- text: the hand-formatted "ID: 1 | Python | Type: Dynamic | ..." listing
+  the tool returned before it had a structured result
+- structured: the LanguagePage result converted exactly as for a real call,
+  into structuredContent plus the text block STRUCTURED_TEXT selects
+  (compact JSON by default)
+
+No database is needed.
+
+Usage:
+    python benchmark_serialization.py [--rows 10 100 1000] [--iterations 200]
+"""
+import argparse
+import json
+import statistics
+import time
+
+import server
+from language_repository import Language
+
+
+def text_page(records):
+    """The former list_coding_languages output"""
+    lines = ["Coding Languages:", "-" * 50]
+    for lang in records:
+        static_type = "Static" if lang['isStatic'] else "Dynamic"
+        lines.append(f"ID: {lang['id']} | {lang['name']} | Type: {static_type} | Creator: {lang['creator']}")
+    return "\n".join(lines) + "\n"
+
+
+def structured_page(records, convert_result):
+    """The list_coding_languages result as FastMCP sends it: (text content, structured content)"""
+    page = server.LanguagePage(languages=[Language.from_record(lang) for lang in records],
+                               next_page_token=server.encode_page_token(records[-1]['id'], len(records), None, None, None))
+    _, structured = convert_result(page)
+    content = server.structured_text(structured)
+    return "".join(block.text for block in content), json.dumps(structured, separators=(",", ":"))
+
+
+def median_us(fn, iterations):
+    fn()
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1e6)
+    return statistics.median(samples)
+
+
+def main(args):
+    print("📦 list_coding_languages Serialization Benchmark")
+    print("=" * 40)
+
+    convert_result = server.mcp._tool_manager.get_tool("list_coding_languages").fn_metadata.convert_result
+    print(f"{'rows':>6} {'text B':>9} {'json text B':>12} {'structured B':>13} {'text us':>9} {'structured us':>14}")
+    for rows in args.rows:
+        records = [{"id": i, "name": f"Language {i}", "isStatic": i % 2 == 0, "creator": "Benchmark Foundation"}
+                   for i in range(1, rows + 1)]
+        text = text_page(records)
+        json_text, structured = structured_page(records, convert_result)
+        text_us = median_us(lambda: text_page(records), args.iterations)
+        structured_us = median_us(lambda: structured_page(records, convert_result), args.iterations)
+        print(f"{rows:>6} {len(text.encode()):>9} {len(json_text.encode()):>12} {len(structured.encode()):>13} "
+              f"{text_us:>9.0f} {structured_us:>14.0f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[10, 100, 1000], help="rows per page")
+    parser.add_argument("--iterations", type=int, default=200)
+    main(parser.parse_args())
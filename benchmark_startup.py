@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Cold-start benchmark for server.py
+
+For each tool group configuration this measures, over several fresh
+processes:
+- the cumulative import time of server.py (python -X importtime)
+- the time from process start to the first tools/list response over stdio
+
+The JSON-RPC handshake is written by hand so the client side adds nothing
+measurable. Results are written as JSON with sorted keys; the tracked
+startup_results.json holds the latest reference run.
+
+Usage:
+    python benchmark_startup.py [--runs 5] [--groups basic basic,weather,database]
+    python benchmark_startup.py --output after.json --compare startup_results.json
+"""
+import argparse
+import json
+import os
+import platform
+import select
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+SERVER_DIR = os.path.dirname(os.path.abspath(__file__))
+SERVER_SCRIPT = os.path.join(SERVER_DIR, "server.py")
+
+DEFAULT_GROUPS = ["basic", "basic,weather", "basic,weather,database"]
+
+
+def server_env(groups):
+    env = {**os.environ, "MCP_TOOL_GROUPS": groups, "MCP_TRANSPORT": "stdio"}
+    env.pop("PORT", None)
+    return env
+
+
+def measure_imports(groups):
+    """Cumulative import time of server.py and its heaviest direct imports, in ms"""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import server"], cwd=SERVER_DIR,
+                            env=server_env(groups), capture_output=True, text=True, check=True)
+    total = None
+    top_level = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if not cumulative.strip().isdigit():
+            continue
+        # Two spaces of indentation per nesting level under the import that pulled it in
+        depth = (len(name) - len(name.lstrip())) // 2
+        if name.strip() == "server" and depth == 0:
+            total = int(cumulative) / 1000
+        elif depth == 1:
+            top_level[name.strip()] = int(cumulative) / 1000
+    return total, top_level
+
+
+def _read_response(process, request_id, deadline):
+    """Next JSON-RPC response with `request_id` from the server's stdout"""
+    while time.monotonic() < deadline:
+        ready, _, _ = select.select([process.stdout], [], [], max(0.0, deadline - time.monotonic()))
+        if not ready:
+            break
+        line = process.stdout.readline()
+        if not line:
+            break
+        message = json.loads(line)
+        if message.get("id") == request_id:
+            return message
+    raise RuntimeError("Server did not answer in time")
+
+
+def _send(process, message):
+    process.stdin.write(json.dumps(message) + "\n")
+    process.stdin.flush()
+
+
+def measure_first_tools_list(groups, timeout=30.0):
+    """Seconds from process start to the tools/list response, and the tool count"""
+    start = time.perf_counter()
+    process = subprocess.Popen([sys.executable, SERVER_SCRIPT], cwd=SERVER_DIR, env=server_env(groups),
+                               stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                               text=True, bufsize=1)
+    try:
+        deadline = time.monotonic() + timeout
+        _send(process, {"jsonrpc": "2.0", "id": 1, "method": "initialize", "params": {
+            "protocolVersion": "2025-06-18",
+            "capabilities": {},
+            "clientInfo": {"name": "benchmark_startup", "version": "1.0"},
+        }})
+        _read_response(process, 1, deadline)
+        _send(process, {"jsonrpc": "2.0", "method": "notifications/initialized"})
+        _send(process, {"jsonrpc": "2.0", "id": 2, "method": "tools/list"})
+        response = _read_response(process, 2, deadline)
+        elapsed = time.perf_counter() - start
+        return elapsed, len(response["result"]["tools"])
+    finally:
+        process.stdin.close()
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def benchmark_groups(groups, runs):
+    import_times = []
+    first_list_times = []
+    top_level = {}
+    tool_count = 0
+    for _ in range(runs):
+        total, modules = measure_imports(groups)
+        import_times.append(total)
+        for name, ms in modules.items():
+            top_level.setdefault(name, []).append(ms)
+        elapsed, tool_count = measure_first_tools_list(groups)
+        first_list_times.append(elapsed)
+
+    heaviest = sorted(((statistics.median(v), k) for k, v in top_level.items()), reverse=True)[:5]
+    return {
+        "tools": tool_count,
+        "import_ms": round(statistics.median(import_times), 1),
+        "first_tools_list_ms": round(statistics.median(first_list_times) * 1000, 1),
+        "heaviest_imports_ms": {name: round(ms, 1) for ms, name in heaviest},
+    }
+
+
+def compare(previous, current):
+    print("\n📊 Compared with previous run:")
+    for groups, result in current["results"].items():
+        before = previous.get("results", {}).get(groups)
+        if not before:
+            continue
+        for field in ("import_ms", "first_tools_list_ms"):
+            change = (result[field] - before[field]) / max(before[field], 1e-9)
+            print(f"   {groups:<24} {field:<20} {before[field]:>8.1f} → {result[field]:>8.1f} ms ({change:+.1%})")
+
+
+def main(args):
+    print("🥶 Cold Start Benchmark")
+    print("=" * 40)
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "python": platform.python_version(),
+            "runs": args.runs,
+        },
+        "results": {},
+    }
+    for groups in args.groups:
+        print(f"   ⏱️  MCP_TOOL_GROUPS={groups} ...", end="", flush=True)
+        result = benchmark_groups(groups, args.runs)
+        report["results"][groups] = result
+        print(f" {result['tools']} tools, import {result['import_ms']} ms, "
+              f"first tools/list {result['first_tools_list_ms']} ms")
+
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+        f.write("\n")
+    print(f"\n✅ Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(json.load(f), report)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="fresh processes per configuration")
+    parser.add_argument("--groups", nargs="+", default=DEFAULT_GROUPS, help="MCP_TOOL_GROUPS values to measure")
+    parser.add_argument("--output", default="startup_results.json")
+    parser.add_argument("--compare", help="earlier results file to compare against")
+    main(parser.parse_args())
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+coding_language_stats from the summary table vs a GROUP BY over every row
+
+Applies pending migrations, seeds the table with generated languages (1M by
+default, spread over --creators creators), and times the stats query on the
+trigger-maintained "codingLanguageStats" table and as a live GROUP BY. Fails
+if the two disagree. The seed rows are inserted in a transaction that is
+rolled back, so the table is left unchanged.
+
+Usage:
+    python local_services.py -- python benchmark_stats.py
+    DB_PASSWORD=... python benchmark_stats.py [--rows 1000000] [--creators 1000]
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import db
+import language_repository as repo
+import migrations
+
+SEED_LANGUAGES = """
+    INSERT INTO "codingLanguage" (name, "isStatic", creator)
+    SELECT 'stats-check-' || g, g % 3 = 0, 'creator ' || g % $2
+    FROM generate_series(1, $1) AS g;
+"""
+
+
+async def time_query(conn, sql, limit, iterations):
+    """Per-call latencies in milliseconds, after one warm-up call, and the rows"""
+    records = await conn.fetch(sql, limit)
+    latencies = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        await conn.fetch(sql, limit)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies, records
+
+
+async def run_benchmark(rows, creators, iterations, limit):
+    print("📊 Stats Benchmark")
+    print("=" * 40)
+    print(f"Database: {db.DB_HOST}:{db.DB_PORT}/{db.DB_NAME}")
+
+    try:
+        async with db.get_db_connection() as conn:
+            await migrations.migrate(conn)
+            await repo.check_schema(conn)
+            if not (await repo.schema_features(conn))["stats_table"]:
+                print("❌ The stats table is missing; check the migration output")
+                return False
+
+            transaction = conn.transaction()
+            await transaction.start()
+            try:
+                start = time.perf_counter()
+                await conn.execute(SEED_LANGUAGES, rows, creators)
+                await conn.execute('ANALYZE "codingLanguage";')
+                print(f"Seeded {rows} rows by {creators} creators in {time.perf_counter() - start:.1f}s")
+                print(f"{iterations} calls per query\n")
+
+                results = {}
+                print(f"{'source':<16} {'median':>10} {'p95':>10}")
+                for label, sql in (("summary table", repo.SELECT_STATS_SUMMARY), ("GROUP BY", repo.SELECT_STATS_LIVE)):
+                    latencies, records = await time_query(conn, sql, limit, iterations)
+                    results[label] = [tuple(record) for record in records]
+                    print(f"{label:<16} {statistics.median(latencies):>8.2f}ms "
+                          f"{statistics.quantiles(latencies, n=20)[-1]:>8.2f}ms")
+            finally:
+                await transaction.rollback()
+    finally:
+        await db.close_pool()
+
+    if results["summary table"] != results["GROUP BY"]:
+        print("\n❌ The summary table disagrees with the table")
+        return False
+    print("\n✅ The summary table matches the table")
+    return True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000, help="generated rows to seed")
+    parser.add_argument("--creators", type=int, default=1000, help="distinct creators among them")
+    parser.add_argument("--iterations", type=int, default=50, help="timed calls per query")
+    parser.add_argument("--limit", type=int, default=100, help="creators per call, as the tool's limit")
+    args = parser.parse_args()
+
+    if not db.DB_PASSWORD:
+        print("❌ DB_PASSWORD not configured")
+        raise SystemExit(1)
+
+    raise SystemExit(0 if asyncio.run(run_benchmark(args.rows, args.creators, args.iterations, args.limit)) else 1)
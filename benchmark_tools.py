@@ -0,0 +1,362 @@
+#!/usr/bin/env python3
+"""
+Benchmark every MCP tool over stdio, SSE and streamable HTTP
+
+Starts server.py locally, drives real MCP call_tool traffic at a configurable
+concurrency and reports throughput, p50/p95/p99 latency, response payload
+size and server RSS per tool. For the HTTP transports it then opens --idle-clients extra sessions
+and reports how many sockets and how much memory each idle client costs the
+server. Weather calls go to a local wttr.in stub so the run is fully offline;
+database tools run only against a local PostgreSQL (set DB_HOST/DB_PORT/
+DB_NAME/DB_USER/DB_PASSWORD, or run under local_services.py for a throwaway
+one; otherwise they are skipped).
+
+Results are written as JSON with sorted keys so two runs can be diffed.
+
+Usage:
+    python benchmark_tools.py [--transport stdio sse streamable-http] [--calls 200] [--concurrency 10]
+    python benchmark_tools.py --output after.json --compare before.json
+    python local_services.py -- python benchmark_tools.py --weather-error-rate 0.05
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from contextlib import AsyncExitStack
+from datetime import datetime
+
+from mcp import ClientSession, StdioServerParameters
+from mcp.client.sse import sse_client
+from mcp.client.stdio import stdio_client
+from mcp.client.streamable_http import streamablehttp_client
+
+from local_services import WeatherStub, free_port
+
+SERVER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "server.py")
+
+LOCAL_HOSTS = {"localhost", "127.0.0.1", "::1"}
+
+# Arguments used for each tool; "{n}" is replaced by the call number
+TOOL_ARGUMENTS = {
+    "add": {"a": 333, "b": 443},
+    "get_secret_word": {},
+    "get_current_time": {},
+    "get_current_weather": {"city": "London"},
+    "get_weather_many": {"cities": ["London", "Paris", "Tokyo", "New York", "Sydney"]},
+    "test_database_connection": {},
+    "list_coding_languages": {"limit": 100},
+    "search_coding_languages": {"query": "python"},
+    "coding_language_stats": {},
+    "add_coding_language": {"name": "bench-{n}", "is_static": False, "creator": "benchmark"},
+    # CSV rather than JSON, whose braces would clash with the "{n}" placeholder
+    "add_coding_languages_bulk": {
+        "payload": "name,is_static,creator\n" + "".join(f"bench-bulk-{{n}}-{i},false,benchmark\n" for i in range(10)),
+        "payload_format": "csv",
+    },
+}
+
+DB_TOOLS = {"test_database_connection", "list_coding_languages", "search_coding_languages",
+            "coding_language_stats", "add_coding_language", "add_coding_languages_bulk"}
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, round(pct / 100 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def read_rss_kb(pid):
+    """Current and peak resident set size of a process, from /proc"""
+    rss = peak = 0
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    rss = int(line.split()[1])
+                elif line.startswith("VmHWM:"):
+                    peak = int(line.split()[1])
+    except OSError:
+        pass
+    return rss, peak
+
+
+def count_sockets(pid):
+    """Open sockets of a process, from /proc/<pid>/fd"""
+    count = 0
+    try:
+        for fd in os.listdir(f"/proc/{pid}/fd"):
+            try:
+                if os.readlink(f"/proc/{pid}/fd/{fd}").startswith("socket:"):
+                    count += 1
+            except OSError:
+                continue
+    except OSError:
+        pass
+    return count
+
+
+def find_child_server_pid():
+    """Pid of the server.py process spawned by the stdio client"""
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+            with open(f"/proc/{entry}/cmdline", "rb") as f:
+                cmdline = f.read()
+        except (OSError, IndexError, ValueError):
+            continue
+        if ppid == os.getpid() and SERVER_SCRIPT.encode() in cmdline:
+            return int(entry)
+    return None
+
+
+async def wait_for_port(port, timeout=15.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            _, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.close()
+            return
+        except OSError:
+            await asyncio.sleep(0.1)
+    raise RuntimeError(f"Server did not start listening on port {port}")
+
+
+def result_size(result):
+    """Bytes of a tool result's text content plus its structured content, as JSON"""
+    size = sum(len(block.text.encode()) for block in result.content if block.type == "text")
+    if result.structuredContent is not None:
+        size += len(json.dumps(result.structuredContent, separators=(",", ":")).encode())
+    return size
+
+
+async def benchmark_tool(session, tool, calls, concurrency, pid):
+    """Run `calls` invocations of one tool with `concurrency` in flight"""
+    template = TOOL_ARGUMENTS[tool]
+    latencies = []
+    payload_bytes = []
+    errors = 0
+    counter = iter(range(calls))
+
+    async def worker():
+        nonlocal errors
+        for n in counter:
+            arguments = {k: v.format(n=n) if isinstance(v, str) else v for k, v in template.items()}
+            start = time.perf_counter()
+            result = await session.call_tool(tool, arguments)
+            latencies.append(time.perf_counter() - start)
+            payload_bytes.append(result_size(result))
+            if result.isError:
+                errors += 1
+
+    # One warm-up call so connection and cache setup are not measured
+    await session.call_tool(tool, {k: v.format(n="warmup") if isinstance(v, str) else v for k, v in template.items()})
+
+    wall_start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    wall_time = time.perf_counter() - wall_start
+
+    latencies.sort()
+    rss, peak = read_rss_kb(pid) if pid else (0, 0)
+    return {
+        "calls": calls,
+        "concurrency": concurrency,
+        "errors": errors,
+        "throughput_per_s": round(calls / wall_time, 1),
+        "payload_bytes": round(sum(payload_bytes) / len(payload_bytes)),
+        "latency_ms": {
+            "p50": round(percentile(latencies, 50) * 1000, 3),
+            "p95": round(percentile(latencies, 95) * 1000, 3),
+            "p99": round(percentile(latencies, 99) * 1000, 3),
+            "max": round(latencies[-1] * 1000, 3),
+        },
+        "rss_kb": rss,
+        "peak_rss_kb": peak,
+    }
+
+
+async def run_tools(session, tools, calls, concurrency, pid):
+    results = {}
+    for tool in tools:
+        print(f"   ⏱️  {tool} ...", end="", flush=True)
+        results[tool] = await benchmark_tool(session, tool, calls, concurrency, pid)
+        print(f" {results[tool]['throughput_per_s']}/s, p50 {results[tool]['latency_ms']['p50']} ms")
+    return results
+
+
+async def benchmark_stdio(env, tools, calls, concurrency, idle_clients):
+    params = StdioServerParameters(command=sys.executable, args=[SERVER_SCRIPT], env=env)
+    with open(os.devnull, "w") as devnull:
+        async with stdio_client(params, errlog=devnull) as (read, write):
+            async with ClientSession(read, write) as session:
+                await session.initialize()
+                return await run_tools(session, tools, calls, concurrency, find_child_server_pid()), None
+
+
+def open_http_client(transport, port):
+    """MCP client context for an HTTP transport; yields (read, write, ...)"""
+    if transport == "sse":
+        return sse_client(f"http://127.0.0.1:{port}/sse")
+    return streamablehttp_client(f"http://127.0.0.1:{port}/mcp")
+
+
+async def measure_idle_clients(transport, port, pid, clients):
+    """Sockets and memory the server holds per connected but idle client"""
+    sockets_before = count_sockets(pid)
+    rss_before, _ = read_rss_kb(pid)
+    async with AsyncExitStack() as stack:
+        for _ in range(clients):
+            read, write, *_ = await stack.enter_async_context(open_http_client(transport, port))
+            session = await stack.enter_async_context(ClientSession(read, write))
+            await session.initialize()
+        await asyncio.sleep(1)
+        sockets = count_sockets(pid) - sockets_before
+        rss = read_rss_kb(pid)[0] - rss_before
+    return {
+        "clients": clients,
+        "server_sockets": sockets,
+        "server_sockets_per_client": round(sockets / clients, 2),
+        "server_rss_kb_per_client": round(rss / clients, 1),
+    }
+
+
+async def benchmark_http(transport, env, tools, calls, concurrency, idle_clients):
+    port = free_port()
+    process = subprocess.Popen([sys.executable, SERVER_SCRIPT],
+                               env={**env, "PORT": str(port), "MCP_TRANSPORT": transport, "MCP_WORKERS": "1"},
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        await wait_for_port(port)
+        async with open_http_client(transport, port) as (read, write, *_):
+            async with ClientSession(read, write) as session:
+                await session.initialize()
+                results = await run_tools(session, tools, calls, concurrency, process.pid)
+        idle = None
+        if idle_clients:
+            print(f"   💤 {idle_clients} idle clients ...", end="", flush=True)
+            idle = await measure_idle_clients(transport, port, process.pid, idle_clients)
+            print(f" {idle['server_sockets_per_client']} sockets and {idle['server_rss_kb_per_client']} KB each")
+        return results, idle
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+async def benchmark_sse(env, tools, calls, concurrency, idle_clients):
+    return await benchmark_http("sse", env, tools, calls, concurrency, idle_clients)
+
+
+async def benchmark_streamable_http(env, tools, calls, concurrency, idle_clients):
+    return await benchmark_http("streamable-http", env, tools, calls, concurrency, idle_clients)
+
+
+TRANSPORTS = {
+    "stdio": benchmark_stdio,
+    "sse": benchmark_sse,
+    "streamable-http": benchmark_streamable_http,
+}
+
+
+def select_tools(requested):
+    """Drop database tools unless a local database is configured"""
+    tools = requested or list(TOOL_ARGUMENTS)
+    if any(tool in DB_TOOLS for tool in tools):
+        db_host = os.environ.get("DB_HOST", "")
+        if not os.environ.get("DB_PASSWORD") or db_host not in LOCAL_HOSTS:
+            print("⚠️  Skipping database tools: point DB_HOST at a local PostgreSQL and set DB_PASSWORD")
+            tools = [tool for tool in tools if tool not in DB_TOOLS]
+    return tools
+
+
+def compare(previous, current):
+    """Print p50 and throughput changes against an earlier results file"""
+    print("\n📊 Compared with previous run:")
+    for transport, tools in current["results"].items():
+        for tool, result in tools.items():
+            before = previous.get("results", {}).get(transport, {}).get(tool)
+            if not before:
+                continue
+            p50_change = (result["latency_ms"]["p50"] - before["latency_ms"]["p50"]) / max(before["latency_ms"]["p50"], 1e-9)
+            tput_change = (result["throughput_per_s"] - before["throughput_per_s"]) / max(before["throughput_per_s"], 1e-9)
+            line = f"   {transport:>15} {tool:<26} p50 {p50_change:+.1%}  throughput {tput_change:+.1%}"
+            if "payload_bytes" in before:
+                line += f"  payload {before['payload_bytes']} -> {result['payload_bytes']} B"
+            print(line)
+
+
+async def main(args):
+    print("🏁 MCP Tool Benchmark")
+    print("=" * 40)
+
+    stub = WeatherStub(latency=args.weather_latency, error_rate=args.weather_error_rate).start()
+    env = {
+        **os.environ,
+        "WEATHER_BASE_URL": stub.url,
+        "WEATHER_CACHE_TTL": str(args.weather_cache_ttl),
+        "WEATHER_CACHE_STALE_TTL": "0",
+    }
+    env.pop("PORT", None)
+    env.pop("MCP_TRANSPORT", None)
+
+    tools = select_tools(args.tools)
+    report = {
+        "meta": {
+            "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "python": platform.python_version(),
+            "calls": args.calls,
+            "concurrency": args.concurrency,
+            "weather_latency_s": args.weather_latency,
+            "weather_cache_ttl_s": args.weather_cache_ttl,
+            "weather_error_rate": args.weather_error_rate,
+        },
+        "results": {},
+        "idle_clients": {},
+    }
+
+    try:
+        for transport in args.transport:
+            print(f"\n🚚 Transport: {transport}")
+            results, idle = await TRANSPORTS[transport](env, tools, args.calls, args.concurrency, args.idle_clients)
+            report["results"][transport] = results
+            if idle:
+                report["idle_clients"][transport] = idle
+    finally:
+        stub.stop()
+
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+        f.write("\n")
+    print(f"\n✅ Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(json.load(f), report)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--transport", nargs="+", choices=list(TRANSPORTS), default=list(TRANSPORTS))
+    parser.add_argument("--tools", nargs="+", choices=list(TOOL_ARGUMENTS))
+    parser.add_argument("--calls", type=int, default=200, help="calls per tool")
+    parser.add_argument("--concurrency", type=int, default=10, help="calls in flight per tool")
+    parser.add_argument("--weather-latency", type=float, default=0.05, help="seconds the wttr.in stub waits")
+    parser.add_argument("--weather-error-rate", type=float, default=0.0,
+                        help="share of stub requests answered with a 503")
+    parser.add_argument("--weather-cache-ttl", type=float, default=0,
+                        help="server weather cache TTL (0 measures the upstream path)")
+    parser.add_argument("--idle-clients", type=int, default=50,
+                        help="idle sessions opened per HTTP transport to measure their cost (0 to skip)")
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument("--compare", help="earlier results file to compare against")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Compare get_weather_many with one get_current_weather call per city
+
+Starts server.py over stdio against the local wttr.in stub from
+local_services.py, with the weather cache off so every city goes upstream.
+For each round it times N sequential get_current_weather calls and one
+get_weather_many call for the same N cities. With bounded fan-out the batch
+should take about one stub latency, not N of them.
+
+Usage:
+    python benchmark_weather_many.py [--cities 10] [--latency 0.2] [--rounds 5]
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+from mcp import ClientSession, StdioServerParameters
+from mcp.client.stdio import stdio_client
+
+from benchmark_tools import SERVER_SCRIPT
+from local_services import WeatherStub
+
+
+async def timed(session, tool, arguments):
+    start = time.perf_counter()
+    result = await session.call_tool(tool, arguments)
+    if result.isError:
+        raise RuntimeError(f"{tool} failed: {result.content}")
+    return time.perf_counter() - start
+
+
+async def main(args):
+    print("🌦️  get_weather_many Benchmark")
+    print("=" * 40)
+
+    stub = WeatherStub(latency=args.latency).start()
+    env = {
+        **os.environ,
+        "WEATHER_BASE_URL": stub.url,
+        "WEATHER_CACHE_TTL": "0",
+        "WEATHER_CACHE_STALE_TTL": "0",
+        "WEATHER_BATCH_CONCURRENCY": str(args.concurrency),
+        "MCP_TOOL_GROUPS": "weather",
+    }
+    env.pop("PORT", None)
+    env.pop("MCP_TRANSPORT", None)
+
+    sequential, batched = [], []
+    try:
+        params = StdioServerParameters(command=sys.executable, args=[SERVER_SCRIPT], env=env)
+        with open(os.devnull, "w") as devnull:
+            async with stdio_client(params, errlog=devnull) as (read, write):
+                async with ClientSession(read, write) as session:
+                    await session.initialize()
+                    await timed(session, "get_current_weather", {"city": "warmup"})
+                    for n in range(args.rounds):
+                        # Fresh names per round so nothing is answered from memory
+                        cities = [f"city-{n}-{i}" for i in range(args.cities)]
+                        sequential.append(sum([await timed(session, "get_current_weather", {"city": city})
+                                               for city in cities]))
+                        cities = [f"batch-{n}-{i}" for i in range(args.cities)]
+                        batched.append(await timed(session, "get_weather_many", {"cities": cities}))
+    finally:
+        stub.stop()
+
+    print(f"   {args.cities} cities, {args.latency * 1000:.0f} ms per upstream fetch, fan-out {args.concurrency}")
+    print(f"   Sequential get_current_weather: median {statistics.median(sequential) * 1000:.0f} ms")
+    print(f"   One get_weather_many call:      median {statistics.median(batched) * 1000:.0f} ms")
+    print(f"   Speedup: {statistics.median(sequential) / statistics.median(batched):.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cities", type=int, default=10, help="cities per round")
+    parser.add_argument("--latency", type=float, default=0.2, help="seconds the wttr.in stub waits per request")
+    parser.add_argument("--concurrency", type=int, default=10, help="WEATHER_BATCH_CONCURRENCY for the server")
+    parser.add_argument("--rounds", type=int, default=5)
+    asyncio.run(main(parser.parse_args()))
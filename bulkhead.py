@@ -0,0 +1,102 @@
+"""
+Concurrency limits with bounded queues for tool calls
+
+A Bulkhead lets `max_concurrency` calls run at once and up to `max_queue`
+more wait for a slot, each for at most `queue_timeout` seconds. Calls beyond
+that fail fast with Busy instead of piling up behind a slow dependency.
+Tools that share a dependency (such as the database pool) can share one
+Bulkhead.
+"""
+import asyncio
+import functools
+import inspect
+import time
+
+from metrics import LIMIT_IN_FLIGHT, LIMIT_QUEUED, LIMIT_QUEUE_WAIT, LIMIT_REJECTED
+
+
+class Busy(Exception):
+    """Raised when no slot is free and the queue is full or the wait timed out"""
+
+
+class Bulkhead:
+    def __init__(self, name, max_concurrency, max_queue, queue_timeout):
+        if max_concurrency < 1:
+            raise ValueError(f"Bulkhead max_concurrency must be positive, got {max_concurrency}")
+
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.running = 0
+        self.queued = 0
+        self._slots = asyncio.Semaphore(max_concurrency)
+
+    async def run(self, fn):
+        """Return `await fn()` once a slot is free, or raise Busy"""
+        if not self._slots.locked():
+            # A slot is free: acquire() returns without suspending
+            await self._slots.acquire()
+            LIMIT_QUEUE_WAIT.observe(0.0, limit=self.name)
+        else:
+            await self._wait_for_slot()
+
+        self.running += 1
+        try:
+            return await fn()
+        finally:
+            self.running -= 1
+            self._slots.release()
+
+    async def _wait_for_slot(self):
+        if self.queued >= self.max_queue:
+            LIMIT_REJECTED.inc(limit=self.name, reason="queue_full")
+            raise Busy(f"{self.name} is busy: {self.running} calls running and {self.queued} waiting")
+
+        self.queued += 1
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(self._slots.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            LIMIT_REJECTED.inc(limit=self.name, reason="timeout")
+            raise Busy(f"{self.name} is busy: no free slot within {self.queue_timeout:g}s") from None
+        finally:
+            self.queued -= 1
+            LIMIT_QUEUE_WAIT.observe(time.perf_counter() - start, limit=self.name)
+
+    def wrap(self, fn, on_busy):
+        """Limit a tool function; `on_busy(error)` gives the result of a rejected call
+
+        The wrapper is async and keeps the signature of `fn`.
+        """
+        async def call(args, kwargs):
+            result = fn(*args, **kwargs)
+            if inspect.isawaitable(result):
+                result = await result
+            return result
+
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            try:
+                return await self.run(lambda: call(args, kwargs))
+            except Busy as e:
+                return on_busy(e)
+
+        return wrapper
+
+    def stats(self):
+        return {"running": self.running, "queued": self.queued}
+
+
+_bulkheads = []
+
+
+def create(name, max_concurrency, max_queue, queue_timeout):
+    """Create a Bulkhead whose in-flight and queued counts are exported as metrics"""
+    bulkhead = Bulkhead(name, max_concurrency, max_queue, queue_timeout)
+    _bulkheads.append(bulkhead)
+    return bulkhead
+
+
+LIMIT_IN_FLIGHT.set_function(lambda: {(b.name,): b.running for b in _bulkheads})
+LIMIT_QUEUED.set_function(lambda: {(b.name,): b.queued for b in _bulkheads})
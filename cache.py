@@ -0,0 +1,159 @@
+"""
+In-process TTL + LRU cache for tool responses
+"""
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger("demo-mcp-server.cache")
+
+
+class _Entry:
+    __slots__ = ("value", "expires_at")
+
+    def __init__(self, value, expires_at):
+        self.value = value
+        self.expires_at = expires_at
+
+
+class TTLCache:
+    """Async cache with expiry, an LRU size bound and single-flight loading
+
+    - Fresh entries are served directly.
+    - Expired entries younger than `stale_ttl` are served immediately while
+      one background task refreshes them (stale-while-revalidate).
+    - Concurrent misses for the same key share one call to the loader.
+    - Loader errors are never cached.
+    - `peek` returns the last stored value, up to a given age, for serving
+      something when the loader's dependency is down.
+    - A load that was running when `invalidate` was called still answers its
+      waiters but is not stored, since it may have read data from before the
+      change.
+    """
+
+    def __init__(self, name, ttl, max_size, stale_ttl=0.0):
+        if max_size < 1:
+            raise ValueError(f"Cache max_size must be positive, got {max_size}")
+
+        self.name = name
+        self.ttl = ttl
+        self.max_size = max_size
+        self.stale_ttl = stale_ttl
+
+        self._entries = OrderedDict()
+        self._inflight = {}
+        self._generation = 0  # bumped by invalidate()
+        self._counters = {
+            "hits": 0,
+            "stale_hits": 0,
+            "misses": 0,
+            "coalesced": 0,
+            "evictions": 0,
+            "refreshes": 0,
+            "refresh_errors": 0,
+            "invalidations": 0,
+            "fallbacks": 0,
+        }
+
+    def __len__(self):
+        return len(self._entries)
+
+    async def get_or_load(self, key, loader):
+        """Return the cached value for `key`, calling `await loader()` on a miss"""
+        now = time.monotonic()
+        entry = self._entries.get(key)
+
+        if entry is not None:
+            if now < entry.expires_at:
+                self._counters["hits"] += 1
+                self._entries.move_to_end(key)
+                return entry.value
+
+            if now < entry.expires_at + self.stale_ttl:
+                self._counters["stale_hits"] += 1
+                self._entries.move_to_end(key)
+                if key not in self._inflight:
+                    self._counters["refreshes"] += 1
+                    task = self._start_load(key, loader)
+                    task.add_done_callback(self._log_refresh_error)
+                return entry.value
+
+        if key in self._inflight:
+            self._counters["coalesced"] += 1
+        else:
+            self._counters["misses"] += 1
+            self._start_load(key, loader)
+
+        # Shield so one cancelled caller does not cancel the load for the others
+        return await asyncio.shield(self._inflight[key])
+
+    def peek(self, key, max_age=None):
+        """Return (value, age in seconds) of the stored entry, even if expired, or None
+
+        Entries older than `max_age` seconds count as missing.
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        age = time.monotonic() - (entry.expires_at - self.ttl)
+        if max_age is not None and age > max_age:
+            return None
+        self._counters["fallbacks"] += 1
+        return entry.value, age
+
+    def _start_load(self, key, loader):
+        task = asyncio.ensure_future(self._load(key, loader, self._generation))
+        self._inflight[key] = task
+        return task
+
+    async def _load(self, key, loader, generation):
+        try:
+            value = await loader()
+            if generation == self._generation:
+                self._store(key, value)
+            return value
+        finally:
+            if self._inflight.get(key) is asyncio.current_task():
+                del self._inflight[key]
+
+    def _store(self, key, value):
+        self._entries[key] = _Entry(value, time.monotonic() + self.ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self._counters["evictions"] += 1
+
+    def _log_refresh_error(self, task):
+        if not task.cancelled() and task.exception() is not None:
+            self._counters["refresh_errors"] += 1
+            logger.warning("Background refresh failed in %s cache: %s", self.name, task.exception())
+
+    def invalidate(self, key=None):
+        """Drop one key, or every entry when no key is given
+
+        Loads already in flight are detached, so callers arriving after this
+        start a fresh load instead of joining one that may return old data.
+        """
+        self._generation += 1
+        self._counters["invalidations"] += 1
+        if key is None:
+            self._entries.clear()
+            self._inflight.clear()
+        else:
+            self._entries.pop(key, None)
+            self._inflight.pop(key, None)
+
+    def stats(self):
+        """Counters and sizing for tuning the cache"""
+        lookups = self._counters["hits"] + self._counters["stale_hits"] + self._counters["misses"] + self._counters["coalesced"]
+        served = self._counters["hits"] + self._counters["stale_hits"] + self._counters["coalesced"]
+        return {
+            "name": self.name,
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl": self.ttl,
+            "stale_ttl": self.stale_ttl,
+            **self._counters,
+            "hit_ratio": round(served / lookups, 4) if lookups else 0.0,
+        }
@@ -0,0 +1,143 @@
+"""
+Circuit breakers for the server's external dependencies
+
+A breaker starts closed and records the outcome of each call over a sliding
+window. Once at least CIRCUIT_MIN_CALLS calls in the window have a failure
+rate of CIRCUIT_FAILURE_RATE or more, or the last CIRCUIT_CONSECUTIVE_FAILURES
+calls all failed, it opens: calls fail immediately with CircuitOpen instead
+of waiting for the dependency to time out. The consecutive count catches a
+dependency that times out so slowly that few calls fit in the window. After
+CIRCUIT_OPEN_SECONDS one probe call is let through (half-open); its success
+closes the breaker and its failure opens it again.
+"""
+import logging
+import os
+import time
+from collections import deque
+
+from metrics import CIRCUIT_STATE, CIRCUIT_TRANSITIONS
+
+logger = logging.getLogger("demo-mcp-server.circuit")
+
+# Circuit breaker configuration
+CIRCUIT_FAILURE_RATE = float(os.environ.get('CIRCUIT_FAILURE_RATE', 0.5))  # share of failed calls that opens a breaker
+CIRCUIT_MIN_CALLS = int(os.environ.get('CIRCUIT_MIN_CALLS', 5))  # calls in the window before the rate is judged
+CIRCUIT_CONSECUTIVE_FAILURES = int(os.environ.get('CIRCUIT_CONSECUTIVE_FAILURES', 3))  # failed calls in a row that open a breaker
+CIRCUIT_WINDOW = float(os.environ.get('CIRCUIT_WINDOW', 30))  # seconds of call outcomes considered
+CIRCUIT_OPEN_SECONDS = float(os.environ.get('CIRCUIT_OPEN_SECONDS', 15))  # seconds open before a probe call is allowed
+
+CLOSED = "closed"
+HALF_OPEN = "half_open"
+OPEN = "open"
+
+# Gauge values for circuit_breaker_state
+STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+_breakers = {}
+
+
+class CircuitOpen(Exception):
+    """Raised instead of calling a dependency whose breaker is open"""
+
+
+class CircuitBreaker:
+    def __init__(self, name, failure_rate=None, min_calls=None, consecutive_failures=None, window=None,
+                 open_seconds=None):
+        self.name = name
+        self.failure_rate = CIRCUIT_FAILURE_RATE if failure_rate is None else failure_rate
+        self.min_calls = CIRCUIT_MIN_CALLS if min_calls is None else min_calls
+        self.consecutive_failures = (CIRCUIT_CONSECUTIVE_FAILURES if consecutive_failures is None
+                                     else consecutive_failures)
+        self.window = CIRCUIT_WINDOW if window is None else window
+        self.open_seconds = CIRCUIT_OPEN_SECONDS if open_seconds is None else open_seconds
+
+        self.state = CLOSED
+        self._outcomes = deque()  # (monotonic time, failed)
+        self._failures_in_a_row = 0
+        self._opened_at = 0.0
+        self._probing = False
+
+    async def call(self, fn, is_failure=lambda exc: True, is_failed_result=None):
+        """Return `await fn()` through the breaker
+
+        `is_failure(exc)` decides whether an exception counts against the
+        dependency; `is_failed_result(result)` flags failures reported as a
+        return value. Raises CircuitOpen without calling `fn` while open.
+        """
+        probe = self._admit()
+        failed = None
+        try:
+            result = await fn()
+            failed = bool(is_failed_result and is_failed_result(result))
+            return result
+        except Exception as e:
+            failed = is_failure(e)
+            raise
+        finally:
+            if probe:
+                self._probing = False
+            # Cancelled calls say nothing about the dependency
+            if failed is not None:
+                self._record(failed, probe)
+
+    def _admit(self):
+        """Raise CircuitOpen unless a call may go through; True for the half-open probe"""
+        if self.state == OPEN:
+            remaining = self._opened_at + self.open_seconds - time.monotonic()
+            if remaining > 0:
+                raise CircuitOpen(f"{self.name} is unavailable (circuit open, next attempt in {remaining:.0f}s)")
+            self._transition(HALF_OPEN)
+        if self.state == HALF_OPEN:
+            if self._probing:
+                raise CircuitOpen(f"{self.name} is unavailable (circuit half-open, probe in progress)")
+            self._probing = True
+            return True
+        return False
+
+    def _record(self, failed, probe):
+        now = time.monotonic()
+        if probe:
+            self._transition(OPEN if failed else CLOSED, now)
+            return
+        if self.state != CLOSED:
+            # Started before the breaker opened; the probe decides from here
+            return
+
+        self._failures_in_a_row = self._failures_in_a_row + 1 if failed else 0
+        if self._failures_in_a_row >= self.consecutive_failures:
+            self._transition(OPEN, now)
+            return
+
+        self._outcomes.append((now, failed))
+        while self._outcomes and self._outcomes[0][0] < now - self.window:
+            self._outcomes.popleft()
+        if len(self._outcomes) >= self.min_calls:
+            failures = sum(1 for _, f in self._outcomes if f)
+            if failures / len(self._outcomes) >= self.failure_rate:
+                self._transition(OPEN, now)
+
+    def _transition(self, state, now=None):
+        if state == self.state:
+            return
+        previous, self.state = self.state, state
+        if state == OPEN:
+            self._opened_at = now or time.monotonic()
+        self._outcomes.clear()
+        self._failures_in_a_row = 0
+        CIRCUIT_TRANSITIONS.inc(breaker=self.name, state=state)
+        log = logger.info if state == CLOSED else logger.warning
+        log("Circuit %s: %s -> %s", self.name, previous, state)
+
+    def stats(self):
+        failures = sum(1 for _, f in self._outcomes if f)
+        return {"name": self.name, "state": self.state, "calls": len(self._outcomes), "failures": failures}
+
+
+def get(name):
+    """The breaker for `name`, created with the default settings on first use"""
+    if name not in _breakers:
+        _breakers[name] = CircuitBreaker(name)
+    return _breakers[name]
+
+
+CIRCUIT_STATE.set_function(lambda: {(b.name,): STATE_VALUES[b.state] for b in _breakers.values()})
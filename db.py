@@ -0,0 +1,255 @@
+"""
+Pooled asyncio PostgreSQL connections for the MCP server tools
+"""
+import asyncio
+import logging
+import os
+import time
+from contextlib import asynccontextmanager
+
+from dotenv import load_dotenv
+
+import circuit_breaker
+from lazy_imports import lazy_import
+
+# Loaded on first database use, so deployments without database tools skip it
+asyncpg = lazy_import("asyncpg")
+
+# Load environment variables from .env file
+load_dotenv()
+
+logger = logging.getLogger("demo-mcp-server.db")
+
+# Database configuration - Using external connection
+# Updated to match Sevalla's environment variable names
+DB_HOST = os.environ.get('DB_HOST', 'northamerica-northeast1-001.proxy.kinsta.app')
+DB_PORT = os.environ.get('DB_PORT', '30888')
+DB_NAME = os.environ.get('DB_DATABASE', os.environ.get('DB_NAME', 'spiritual-orange-blackbird'))  # Sevalla uses DB_DATABASE
+DB_USER = os.environ.get('DB_USERNAME', os.environ.get('DB_USER', 'marmoset'))  # Sevalla uses DB_USERNAME
+DB_PASSWORD = os.environ.get('DB_PASSWORD', '')  # Same in both
+
+# Pool configuration
+DB_POOL_MIN_SIZE = int(os.environ.get('DB_POOL_MIN_SIZE', 1))
+DB_POOL_MAX_SIZE = int(os.environ.get('DB_POOL_MAX_SIZE', 10))
+DB_POOL_MAX_IDLE = float(os.environ.get('DB_POOL_MAX_IDLE', 300))  # seconds before an idle connection is recycled
+DB_POOL_MAX_LIFETIME = float(os.environ.get('DB_POOL_MAX_LIFETIME', 1800))  # seconds before any connection is recycled
+DB_POOL_HEALTH_CHECK_AFTER = float(os.environ.get('DB_POOL_HEALTH_CHECK_AFTER', 30))  # ping connections idle longer than this
+DB_POOL_TIMEOUT = float(os.environ.get('DB_POOL_TIMEOUT', 10))  # seconds to wait for a free connection
+DB_CONNECT_TIMEOUT = float(os.environ.get('DB_CONNECT_TIMEOUT', 10))  # seconds to open a new connection
+DB_STATEMENT_CACHE_SIZE = int(os.environ.get('DB_STATEMENT_CACHE_SIZE', 100))  # prepared statements kept per connection
+DB_LISTEN_RETRY_INTERVAL = float(os.environ.get('DB_LISTEN_RETRY_INTERVAL', 5))  # seconds between LISTEN reconnect attempts
+
+# Bookkeeping per backend, keyed by server pid (unique per open connection)
+_created_at = {}
+_last_used = {}
+
+_pool = None
+# The pool creation in progress; every caller waiting for the pool shares it
+_pool_task = None
+
+# Opens when connecting keeps failing, so tools error out at once instead of
+# each waiting for the connect timeout
+breaker = circuit_breaker.get("database")
+
+
+class PoolTimeout(asyncio.TimeoutError):
+    """Raised when every pooled connection stayed checked out for DB_POOL_TIMEOUT"""
+
+
+async def _init_connection(conn):
+    """Called by asyncpg once for every new physical connection"""
+    now = time.monotonic()
+    _created_at[conn.get_server_pid()] = now
+    _last_used[conn.get_server_pid()] = now
+
+
+async def _is_usable(conn):
+    """Decide whether a checked out connection can be handed to a tool"""
+    pid = conn.get_server_pid()
+    now = time.monotonic()
+    if now - _created_at.get(pid, now) > DB_POOL_MAX_LIFETIME:
+        return False
+    if now - _last_used.get(pid, now) > DB_POOL_HEALTH_CHECK_AFTER:
+        try:
+            await conn.execute('SELECT 1;', timeout=DB_POOL_TIMEOUT)
+        except (asyncpg.PostgresError, asyncpg.InterfaceError, OSError, asyncio.TimeoutError):
+            return False
+    return True
+
+
+def _is_outage(exc):
+    """Errors that mean the database is unreachable, as opposed to a bad query
+
+    A full pool means the server is busy, not down, so PoolTimeout does not
+    count; a timeout while opening a connection does.
+    """
+    if isinstance(exc, PoolTimeout):
+        return False
+    return isinstance(exc, (OSError, asyncio.TimeoutError, asyncpg.InterfaceError,
+                            asyncpg.PostgresConnectionError, asyncpg.CannotConnectNowError,
+                            asyncpg.TooManyConnectionsError))
+
+
+def _forget(conn):
+    pid = conn.get_server_pid()
+    _created_at.pop(pid, None)
+    _last_used.pop(pid, None)
+
+
+async def _create_pool():
+    global _pool
+    try:
+        pool = await asyncpg.create_pool(
+            host=DB_HOST,
+            port=int(DB_PORT),
+            database=DB_NAME,
+            user=DB_USER,
+            password=DB_PASSWORD,
+            min_size=DB_POOL_MIN_SIZE,
+            max_size=DB_POOL_MAX_SIZE,
+            max_inactive_connection_lifetime=DB_POOL_MAX_IDLE,
+            # asyncpg prepares each distinct query once per connection and
+            # reuses the server-side statement while it stays in this cache
+            statement_cache_size=DB_STATEMENT_CACHE_SIZE,
+            init=_init_connection,
+            timeout=DB_CONNECT_TIMEOUT
+        )
+    except (asyncpg.PostgresError, OSError, asyncio.TimeoutError) as e:
+        logger.error("Database connection error: %s", e)
+        logger.error("Connection details - Host: %s, Port: %s, Database: %s, User: %s", DB_HOST, DB_PORT, DB_NAME, DB_USER)
+        raise
+    logger.info("Database pool ready (%d-%d connections) for %s:%s/%s",
+                DB_POOL_MIN_SIZE, DB_POOL_MAX_SIZE, DB_HOST, DB_PORT, DB_NAME)
+    _pool = pool
+    return pool
+
+
+def _pool_created(task):
+    global _pool_task
+    _pool_task = None
+    if not task.cancelled():
+        task.exception()  # retrieved by the waiters, if any are left
+
+
+async def init_pool():
+    """Create the shared pool (called once from the server lifespan)
+
+    Callers that arrive while the pool is being created wait for that one
+    attempt and share its failure, instead of each retrying the connect in
+    turn behind the others.
+    """
+    global _pool_task
+    if _pool is not None:
+        return _pool
+    if _pool_task is None:
+        _pool_task = asyncio.ensure_future(_create_pool())
+        _pool_task.add_done_callback(_pool_created)
+    # A cancelled caller must not cancel the attempt the others wait for
+    return await asyncio.shield(_pool_task)
+
+
+async def close_pool():
+    """Close the shared pool if it was created"""
+    global _pool
+    if _pool_task is not None:
+        _pool_task.cancel()
+    pool, _pool = _pool, None
+    if pool is not None:
+        try:
+            await asyncio.wait_for(pool.close(), timeout=DB_POOL_TIMEOUT)
+        except asyncio.TimeoutError:
+            logger.warning("Timed out waiting for database connections to be released, terminating")
+            pool.terminate()
+        _created_at.clear()
+        _last_used.clear()
+        logger.info("Database pool closed")
+
+
+def pool_stats():
+    """Connection counts for metrics; empty until the pool exists"""
+    if _pool is None:
+        return {}
+    size = _pool.get_size()
+    idle = _pool.get_idle_size()
+    return {"in_use": size - idle, "idle": idle, "max": _pool.get_max_size()}
+
+
+async def _acquire():
+    pool = await init_pool()
+
+    # Every pooled connection may turn out stale, plus one freshly opened
+    for _ in range(DB_POOL_MAX_SIZE + 1):
+        try:
+            conn = await pool.acquire(timeout=DB_POOL_TIMEOUT)
+        except asyncio.TimeoutError:
+            # get_size() counts only open connections, so a full pool with none
+            # idle means the wait was for a busy connection rather than a connect
+            if pool.get_size() >= pool.get_max_size() and pool.get_idle_size() == 0:
+                raise PoolTimeout(f"No database connection became free within {DB_POOL_TIMEOUT:g}s") from None
+            raise
+        if await _is_usable(conn):
+            return pool, conn
+        _forget(conn)
+        conn.terminate()
+        await pool.release(conn)
+    raise asyncpg.InterfaceError("Could not obtain a healthy database connection")
+
+
+@asynccontextmanager
+async def get_db_connection():
+    """Borrow a pooled database connection
+
+    Usage:
+        async with get_db_connection() as conn:
+            ...
+
+    Raises CircuitOpen without trying to connect while the database
+    breaker is open.
+    """
+    pool, conn = await breaker.call(_acquire, is_failure=_is_outage)
+    try:
+        yield conn
+    finally:
+        if not conn.is_closed():
+            _last_used[conn.get_server_pid()] = time.monotonic()
+        await pool.release(conn)
+
+
+async def listen(channel, on_notify, on_connect=None):
+    """Receive NOTIFY payloads on `channel` until cancelled
+
+    Uses a dedicated connection outside the pool, since LISTEN is bound to
+    its session. `on_notify(payload)` runs for every notification and
+    `on_connect()` after every (re)connect, because notifications sent while
+    disconnected are lost.
+    """
+    while True:
+        try:
+            conn = await asyncpg.connect(
+                host=DB_HOST,
+                port=int(DB_PORT),
+                database=DB_NAME,
+                user=DB_USER,
+                password=DB_PASSWORD,
+                timeout=DB_POOL_TIMEOUT,
+            )
+        except (asyncpg.PostgresError, OSError, asyncio.TimeoutError) as e:
+            logger.warning("LISTEN %s connection failed: %s", channel, e)
+            await asyncio.sleep(DB_LISTEN_RETRY_INTERVAL)
+            continue
+
+        lost = asyncio.Event()
+        try:
+            conn.add_termination_listener(lambda _conn: lost.set())
+            await conn.add_listener(channel, lambda _conn, _pid, _channel, payload: on_notify(payload))
+            logger.info("Listening for %s notifications", channel)
+            if on_connect is not None:
+                on_connect()
+            await lost.wait()
+            logger.warning("LISTEN %s connection lost, reconnecting", channel)
+        except (asyncpg.PostgresError, OSError) as e:
+            logger.warning("LISTEN %s failed: %s", channel, e)
+        finally:
+            if not conn.is_closed():
+                await conn.close()
+        await asyncio.sleep(DB_LISTEN_RETRY_INTERVAL)
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+One-time migration: merge duplicate coding languages and make names unique
+
+Rows whose names match after trimming and ignoring case are duplicates. The
+oldest row (lowest id) of each group is kept and the others are deleted.
+In the same transaction the migration adds the unique index on the
+normalized name, plus the "codingLanguageRequest" table that stores
+add_coding_language idempotency keys. Writes to the table are blocked while
+it runs.
+
+Pending schema migrations (migrations.py) are applied afterwards. Restart
+the server so it switches idempotent adds to INSERT ... ON CONFLICT.
+
+Usage:
+    python dedupe_languages.py --dry-run   # list what would be removed
+    python dedupe_languages.py
+"""
+import argparse
+import asyncio
+
+import db
+import language_repository
+import migrations
+
+
+async def _run(dry_run):
+    try:
+        async with db.get_db_connection() as conn:
+            if dry_run:
+                return await language_repository.find_duplicates(conn)
+            duplicates = await language_repository.merge_duplicates(conn)
+            await migrations.migrate(conn)
+            return duplicates
+    finally:
+        await db.close_pool()
+
+
+def dedupe_languages(dry_run=False):
+    print("🧹 Merge Duplicate Coding Languages")
+    print("=" * 40)
+
+    if not db.DB_PASSWORD:
+        print("❌ DB_PASSWORD not configured")
+        return False
+
+    try:
+        duplicates = asyncio.run(_run(dry_run))
+    except Exception as e:
+        print(f"❌ Database error: {str(e)}")
+        return False
+
+    for duplicate in duplicates:
+        print(f"   ID {duplicate['id']} ({duplicate['name']}) -> kept ID {duplicate['keep_id']}")
+
+    if dry_run:
+        print(f"\n🔎 {len(duplicates)} duplicate rows would be removed")
+    else:
+        print(f"\n✅ Removed {len(duplicates)} duplicate rows; names are now unique")
+    return True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dry-run", action="store_true", help="only list the rows that would be removed")
+    args = parser.parse_args()
+    raise SystemExit(0 if dedupe_languages(args.dry_run) else 1)
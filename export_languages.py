@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Export coding languages as JSONL or CSV in bounded memory
+
+Rows are streamed through a server-side cursor, so the export size is not
+limited by available memory.
+
+Usage:
+    python export_languages.py [--format jsonl|csv] [--creator NAME] [--static | --dynamic] > languages.jsonl
+"""
+import argparse
+import asyncio
+import csv
+import json
+import sys
+
+import db
+import language_repository
+
+
+async def export_languages(out, fmt, is_static=None, creator=None, name_prefix=None):
+    """Write every matching language to `out`, returning the row count"""
+    count = 0
+    writer = None
+    if fmt == "csv":
+        writer = csv.writer(out)
+        writer.writerow(["id", "name", "isStatic", "creator"])
+
+    try:
+        async with db.get_db_connection() as conn:
+            async with conn.transaction(readonly=True):
+                async for lang in language_repository.iter_languages(conn, is_static=is_static, creator=creator,
+                                                                     name_prefix=name_prefix):
+                    if writer is not None:
+                        writer.writerow([lang['id'], lang['name'], lang['isStatic'], lang['creator']])
+                    else:
+                        out.write(json.dumps(dict(lang)) + "\n")
+                    count += 1
+    finally:
+        await db.close_pool()
+    return count
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--format", choices=["jsonl", "csv"], default="jsonl")
+    parser.add_argument("--creator")
+    parser.add_argument("--name-prefix")
+    typing = parser.add_mutually_exclusive_group()
+    typing.add_argument("--static", dest="is_static", action="store_true", default=None)
+    typing.add_argument("--dynamic", dest="is_static", action="store_false")
+    args = parser.parse_args()
+
+    if not db.DB_PASSWORD:
+        print("❌ DB_PASSWORD not configured", file=sys.stderr)
+        raise SystemExit(1)
+
+    exported = asyncio.run(export_languages(sys.stdout, args.format, args.is_static, args.creator, args.name_prefix))
+    print(f"✅ Exported {exported} coding languages", file=sys.stderr)
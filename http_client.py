@@ -0,0 +1,125 @@
+"""
+Shared async HTTP client for outbound tool calls
+"""
+import asyncio
+import logging
+import os
+import random
+import time
+from urllib.parse import urlsplit
+
+import httpx
+
+import circuit_breaker
+from metrics import HTTP_DURATION, HTTP_REQUESTS
+
+logger = logging.getLogger("demo-mcp-server.http")
+
+# HTTP client configuration
+HTTP_MAX_CONNECTIONS = int(os.environ.get('HTTP_MAX_CONNECTIONS', 100))  # across all hosts
+HTTP_MAX_CONNECTIONS_PER_HOST = int(os.environ.get('HTTP_MAX_CONNECTIONS_PER_HOST', 10))
+HTTP_MAX_KEEPALIVE = int(os.environ.get('HTTP_MAX_KEEPALIVE', 20))  # idle keep-alive connections kept open
+HTTP_KEEPALIVE_EXPIRY = float(os.environ.get('HTTP_KEEPALIVE_EXPIRY', 30))  # seconds an idle connection is kept
+HTTP_CONNECT_TIMEOUT = float(os.environ.get('HTTP_CONNECT_TIMEOUT', 3))
+HTTP_READ_TIMEOUT = float(os.environ.get('HTTP_READ_TIMEOUT', 10))
+HTTP_RETRIES = int(os.environ.get('HTTP_RETRIES', 2))  # extra attempts after the first
+HTTP_RETRY_BACKOFF = float(os.environ.get('HTTP_RETRY_BACKOFF', 0.2))  # seconds, doubled per attempt
+
+# Responses worth retrying: rate limiting and transient upstream failures
+RETRY_STATUS_CODES = {429, 502, 503, 504}
+
+_client = None
+_host_limits = {}
+
+
+def _create_client():
+    return httpx.AsyncClient(
+        http1=True,
+        http2=False,
+        limits=httpx.Limits(
+            max_connections=HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+            keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+        ),
+        timeout=httpx.Timeout(
+            connect=HTTP_CONNECT_TIMEOUT,
+            read=HTTP_READ_TIMEOUT,
+            write=HTTP_READ_TIMEOUT,
+            pool=HTTP_CONNECT_TIMEOUT,
+        ),
+        headers={"User-Agent": "demo-mcp-server"},
+    )
+
+
+def init_client():
+    """Create the shared client (called once from the server lifespan)"""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = _create_client()
+    return _client
+
+
+async def close_client():
+    """Close the shared client and its pooled connections"""
+    global _client
+    client, _client = _client, None
+    _host_limits.clear()
+    if client is not None:
+        await client.aclose()
+
+
+def _host_limit(host):
+    if host not in _host_limits:
+        _host_limits[host] = asyncio.Semaphore(HTTP_MAX_CONNECTIONS_PER_HOST)
+    return _host_limits[host]
+
+
+async def get(url, **kwargs):
+    """GET `url` over the shared client, retrying transient failures
+
+    Retries connection errors, connect timeouts and RETRY_STATUS_CODES with
+    exponential backoff and jitter. Read timeouts are not retried: the host
+    accepted the request, and another attempt would most likely wait just as
+    long. The last response is returned (or the last error raised) once the
+    retries are used up.
+
+    Each host has a circuit breaker, and every attempt counts towards it when
+    it ends in a transport error or a 5xx/429 response; while it is open this
+    raises CircuitOpen without sending anything.
+    """
+    host = urlsplit(url).netloc
+    breaker = circuit_breaker.get(host)
+    for attempt in range(HTTP_RETRIES + 1):
+        try:
+            response = await breaker.call(
+                lambda: _send(url, host, **kwargs),
+                is_failure=lambda e: isinstance(e, httpx.TransportError),
+                is_failed_result=lambda r: r.status_code >= 500 or r.status_code == 429,
+            )
+        except httpx.TransportError as e:
+            if attempt == HTTP_RETRIES or isinstance(e, httpx.ReadTimeout):
+                raise
+            logger.warning("GET %s failed (%s: %s), retrying", url, e.__class__.__name__, e)
+        else:
+            if response.status_code not in RETRY_STATUS_CODES or attempt == HTTP_RETRIES:
+                return response
+            logger.warning("GET %s returned %d, retrying", url, response.status_code)
+
+        await asyncio.sleep(HTTP_RETRY_BACKOFF * (2 ** attempt) * random.uniform(0.5, 1.5))
+
+
+async def _send(url, host, **kwargs):
+    """One attempt, counted in the HTTP metrics"""
+    client = init_client()
+    try:
+        async with _host_limit(host):
+            start = time.perf_counter()
+            try:
+                response = await client.get(url, **kwargs)
+            finally:
+                HTTP_DURATION.observe(time.perf_counter() - start, host=host)
+    except httpx.TransportError as e:
+        HTTP_REQUESTS.inc(host=host, status=e.__class__.__name__)
+        raise
+    HTTP_REQUESTS.inc(host=host, status=str(response.status_code))
+    return response
@@ -0,0 +1,679 @@
+"""
+All queries against the "codingLanguage" table
+
+Every query is a fixed SQL string defined here. asyncpg keys its per-connection
+prepared statement cache on the SQL text, so each query is parsed and planned
+once per pooled connection and later calls only bind and execute. The schema
+checks run once at startup and are cached.
+
+The schema is created and upgraded by migrations.py from the DDL defined
+here. Names are unique after normalization (trimmed, case-insensitive) once
+DEDUP_MIGRATION has run; dedupe_languages.py merges existing duplicates so
+that it can.
+
+Writes to the table from any process are announced on the CHANGE_CHANNEL
+notification channel by a statement-level trigger, which lets in-process
+caches of the table invalidate themselves. Other statement-level triggers keep
+per-creator counts in "codingLanguageStats" for the statistics.
+"""
+import collections
+import csv
+import io
+import json
+import re
+
+from pydantic import BaseModel
+
+# Default page sizes of list_coding_languages and search_coding_languages,
+# shared with the scripts that check the plans of those queries
+LIST_DEFAULT_LIMIT = 100
+SEARCH_DEFAULT_LIMIT = 20
+
+SERVER_VERSION = 'SELECT version();'
+
+# Matches the production table
+CREATE_TABLE = """
+    CREATE TABLE IF NOT EXISTS "codingLanguage" (
+        id SERIAL PRIMARY KEY,
+        name VARCHAR(255) NOT NULL,
+        "isStatic" BOOLEAN NOT NULL DEFAULT FALSE,
+        creator VARCHAR(255)
+    );
+"""
+
+TABLE_EXISTS = """
+    SELECT EXISTS (
+        SELECT FROM information_schema.tables
+        WHERE table_name = 'codingLanguage'
+    );
+"""
+
+# Whether DEDUP_MIGRATION has been applied
+SCHEMA_FEATURES = """
+    SELECT to_regclass('coding_language_name_key') IS NOT NULL AS name_index,
+           to_regclass('"codingLanguageRequest"') IS NOT NULL AS request_table,
+           to_regclass('coding_language_name_trgm_idx') IS NOT NULL AS trigram_index,
+           to_regclass('"codingLanguageStats"') IS NOT NULL AS stats_table;
+"""
+
+INSERT_LANGUAGE = """
+    INSERT INTO "codingLanguage" (name, "isStatic", creator)
+    VALUES ($1, $2, $3)
+    RETURNING id, name, "isStatic", creator;
+"""
+
+# Inserts unless the normalized name exists and returns the stored row either
+# way. Nothing comes back when the conflicting row was committed after this
+# statement's snapshot was taken; running it again finds that row.
+INSERT_LANGUAGE_IDEMPOTENT = """
+    WITH inserted AS (
+        INSERT INTO "codingLanguage" (name, "isStatic", creator)
+        VALUES ($1, $2, $3)
+        ON CONFLICT ((lower(btrim(name)))) DO NOTHING
+        RETURNING id, name, "isStatic", creator
+    )
+    SELECT id, name, "isStatic", creator, true AS created FROM inserted
+    UNION ALL
+    SELECT id, name, "isStatic", creator, false FROM "codingLanguage"
+    WHERE lower(btrim(name)) = lower(btrim($1))
+    LIMIT 1;
+"""
+
+SELECT_LANGUAGE_BY_NAME = """
+    SELECT id, name, "isStatic", creator FROM "codingLanguage"
+    WHERE lower(btrim(name)) = lower(btrim($1))
+    ORDER BY id
+    LIMIT 1;
+"""
+
+# Serializes idempotent adds of one name while the unique index is missing
+NAME_LOCK = "SELECT pg_advisory_xact_lock(hashtext('codingLanguage:' || lower(btrim($1))));"
+
+# Serializes calls that share an idempotency key
+REQUEST_LOCK = "SELECT pg_advisory_xact_lock(hashtext('codingLanguageRequest:' || $1));"
+
+SELECT_REQUEST = """
+    SELECT l.id, l.name, l."isStatic", l.creator
+    FROM "codingLanguageRequest" r JOIN "codingLanguage" l ON l.id = r.language_id
+    WHERE r.key = $1;
+"""
+
+INSERT_REQUEST = """
+    INSERT INTO "codingLanguageRequest" (key, language_id)
+    VALUES ($1, $2)
+    ON CONFLICT (key) DO NOTHING;
+"""
+
+COUNT_DUPLICATES = """
+    SELECT COUNT(*) - COUNT(DISTINCT lower(btrim(name))) FROM "codingLanguage";
+"""
+
+# Rows that DEDUP_MIGRATION would delete, with the row each one merges into
+SELECT_DUPLICATES = """
+    SELECT id, name, keep_id FROM (
+        SELECT id, name, min(id) OVER (PARTITION BY lower(btrim(name))) AS keep_id
+        FROM "codingLanguage"
+    ) ranked
+    WHERE id <> keep_id
+    ORDER BY keep_id, id;
+"""
+
+DELETE_DUPLICATES = """
+    DELETE FROM "codingLanguage" c
+    USING (
+        SELECT id, min(id) OVER (PARTITION BY lower(btrim(name))) AS keep_id
+        FROM "codingLanguage"
+    ) ranked
+    WHERE c.id = ranked.id AND ranked.id <> ranked.keep_id
+    RETURNING c.id, c.name, ranked.keep_id;
+"""
+
+# Blocks writes, so no new duplicate can appear between the delete and the index
+DEDUP_LOCK = 'LOCK TABLE "codingLanguage" IN SHARE ROW EXCLUSIVE MODE;'
+
+# Needs a table without duplicate names; dedupe_languages.py applies it right
+# after DELETE_DUPLICATES, in the same transaction
+DEDUP_MIGRATION = """
+    CREATE UNIQUE INDEX IF NOT EXISTS coding_language_name_key ON "codingLanguage" (lower(btrim(name)));
+    CREATE TABLE IF NOT EXISTS "codingLanguageRequest" (
+        key TEXT PRIMARY KEY,
+        language_id INTEGER NOT NULL REFERENCES "codingLanguage" (id) ON DELETE CASCADE,
+        created_at TIMESTAMPTZ NOT NULL DEFAULT now()
+    );
+"""
+
+# Indexes for the build_language_query filters. Pages are ordered by id, so
+# the equality filters carry id as a second column and a keyset page reads
+# them in order; text_pattern_ops serves the prefix LIKE in any collation.
+CREATE_LISTING_INDEXES = """
+    CREATE INDEX IF NOT EXISTS coding_language_lower_name_idx ON "codingLanguage" (lower(name) text_pattern_ops);
+    CREATE INDEX IF NOT EXISTS coding_language_creator_idx ON "codingLanguage" (creator, id);
+    CREATE INDEX IF NOT EXISTS coding_language_is_static_idx ON "codingLanguage" ("isStatic", id);
+"""
+
+# Name words weigh more than creator words in the rank; queries must repeat
+# this expression exactly for the planner to use the index
+SEARCH_DOCUMENT = """(setweight(to_tsvector('simple', name), 'A')
+        || setweight(to_tsvector('simple', coalesce(creator, '')), 'B'))"""
+
+# Without the pending list every search reads only the index proper; adds are
+# single rows, so the slower insert does not matter
+CREATE_SEARCH_INDEX = f"""
+    CREATE INDEX IF NOT EXISTS coding_language_search_idx ON "codingLanguage" USING gin ({SEARCH_DOCUMENT})
+        WITH (fastupdate = off);
+"""
+
+TRIGRAM_AVAILABLE = "SELECT EXISTS (SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm');"
+
+CREATE_TRIGRAM_INDEX = """
+    CREATE EXTENSION IF NOT EXISTS pg_trgm;
+    CREATE INDEX IF NOT EXISTS coding_language_name_trgm_idx ON "codingLanguage" USING gist (lower(name) gist_trgm_ops);
+"""
+
+# Candidates from each index, best match per row, ranked by match kind and
+# then score. Prefix matches are sorted with the text_pattern_ops operator so
+# the lower(name) index returns them in order and stops at the limit. Word
+# matches in the name and anywhere are limited separately, so that creator
+# matches for a common word cannot crowd out name matches, and each keeps its
+# best-scoring rows (ties by id) so the final ranking sees the same ones on
+# every run. $1 normalized
+# query, $2 its LIKE prefix, $3 tsquery over name words, $4 tsquery over all
+# words, $5 limit.
+SEARCH_LANGUAGES = f"""
+    WITH candidates AS (
+        (SELECT id, 1 AS rank, 'prefix' AS match, length($1::text)::float8 / length(name) AS score
+         FROM "codingLanguage" WHERE lower(name) LIKE $2
+         ORDER BY lower(name) USING ~<~ LIMIT $5)
+        UNION ALL
+        (SELECT id, 2, 'name', ts_rank({SEARCH_DOCUMENT}, query)
+         FROM "codingLanguage", to_tsquery('simple', $3::text) AS query
+         WHERE {SEARCH_DOCUMENT} @@ query
+         ORDER BY 4 DESC, id LIMIT $5)
+        UNION ALL
+        (SELECT id, 3, 'creator', ts_rank({SEARCH_DOCUMENT}, query)
+         FROM "codingLanguage", to_tsquery('simple', $4::text) AS query
+         WHERE {SEARCH_DOCUMENT} @@ query
+         ORDER BY 4 DESC, id LIMIT $5)
+        {{fuzzy}}
+    ), best AS (
+        SELECT DISTINCT ON (id) id, rank, match, score FROM candidates ORDER BY id, rank, score DESC
+    )
+    SELECT l.id, l.name, l."isStatic", l.creator, best.match, best.score
+    FROM best JOIN "codingLanguage" l USING (id)
+    ORDER BY best.rank, best.score DESC, l.id
+    LIMIT $5;
+"""
+
+# Names within pg_trgm.similarity_threshold, nearest first from the GiST index
+SEARCH_FUZZY = """
+        UNION ALL
+        (SELECT id, 4, 'fuzzy', similarity(lower(name), $1)
+         FROM "codingLanguage" WHERE lower(name) % $1
+         ORDER BY lower(name) <-> $1 LIMIT $5)"""
+
+INSERT_LANGUAGES_BULK = """
+    INSERT INTO "codingLanguage" (name, "isStatic", creator)
+    SELECT name, is_static, creator
+    FROM unnest($1::text[], $2::boolean[], $3::text[]) WITH ORDINALITY AS t(name, is_static, creator, ord)
+    ORDER BY ord
+    ON CONFLICT DO NOTHING
+    RETURNING id, name, "isStatic", creator;
+"""
+
+SELECT_LANGUAGES = 'SELECT id, name, "isStatic", creator FROM "codingLanguage"'
+
+COUNT_LANGUAGES = 'SELECT COUNT(*) FROM "codingLanguage";'
+
+CHANGE_CHANNEL = "coding_language_changed"
+
+CREATE_CHANGE_FUNCTION = f"""
+    CREATE OR REPLACE FUNCTION notify_coding_language_changed() RETURNS trigger AS $$
+    BEGIN
+        -- Statements that change no rows, such as an INSERT ... ON CONFLICT DO
+        -- NOTHING that hit an existing name, leave the caches alone
+        IF TG_OP = 'TRUNCATE' OR EXISTS (SELECT 1 FROM changed_rows) THEN
+            PERFORM pg_notify('{CHANGE_CHANNEL}', TG_OP);
+        END IF;
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql;
+"""
+
+# One trigger per operation, as each names its own transition table; replaces
+# the single trigger earlier versions installed, which notified on every statement
+CREATE_CHANGE_TRIGGER = """
+    DO $$
+    BEGIN
+        IF NOT EXISTS (
+            SELECT FROM pg_trigger
+            WHERE tgname = 'coding_language_changed_insert' AND tgrelid = '"codingLanguage"'::regclass
+        ) THEN
+            DROP TRIGGER IF EXISTS coding_language_changed ON "codingLanguage";
+            CREATE TRIGGER coding_language_changed_insert AFTER INSERT ON "codingLanguage"
+                REFERENCING NEW TABLE AS changed_rows
+                FOR EACH STATEMENT EXECUTE FUNCTION notify_coding_language_changed();
+            CREATE TRIGGER coding_language_changed_update AFTER UPDATE ON "codingLanguage"
+                REFERENCING NEW TABLE AS changed_rows
+                FOR EACH STATEMENT EXECUTE FUNCTION notify_coding_language_changed();
+            CREATE TRIGGER coding_language_changed_delete AFTER DELETE ON "codingLanguage"
+                REFERENCING OLD TABLE AS changed_rows
+                FOR EACH STATEMENT EXECUTE FUNCTION notify_coding_language_changed();
+            CREATE TRIGGER coding_language_changed_truncate AFTER TRUNCATE ON "codingLanguage"
+                FOR EACH STATEMENT EXECUTE FUNCTION notify_coding_language_changed();
+        END IF;
+    END
+    $$;
+"""
+
+# Serializes trigger installation between server processes starting together
+CHANGE_TRIGGER_LOCK = "SELECT pg_advisory_xact_lock(hashtext('coding_language_changed'));"
+
+# Row counts per (creator, "isStatic"), kept current by statement-level
+# triggers so the stats never scan "codingLanguage". A missing creator is
+# counted under ''. Rows are upserted in key order so that concurrent
+# writers lock them in the same order.
+CREATE_STATS_TABLE = """
+    CREATE TABLE IF NOT EXISTS "codingLanguageStats" (
+        creator VARCHAR(255) NOT NULL,
+        "isStatic" BOOLEAN NOT NULL,
+        count BIGINT NOT NULL,
+        PRIMARY KEY (creator, "isStatic")
+    );
+
+    CREATE OR REPLACE FUNCTION count_coding_languages() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP = 'TRUNCATE' THEN
+            DELETE FROM "codingLanguageStats";
+            RETURN NULL;
+        END IF;
+        -- A statement only sees the transition tables its trigger declares
+        IF TG_OP = 'INSERT' THEN
+            INSERT INTO "codingLanguageStats" AS stats (creator, "isStatic", count)
+            SELECT coalesce(creator, ''), "isStatic", count(*) FROM new_rows
+            GROUP BY 1, 2 ORDER BY 1, 2
+            ON CONFLICT (creator, "isStatic") DO UPDATE SET count = stats.count + EXCLUDED.count;
+        ELSIF TG_OP = 'DELETE' THEN
+            INSERT INTO "codingLanguageStats" AS stats (creator, "isStatic", count)
+            SELECT coalesce(creator, ''), "isStatic", -count(*) FROM old_rows
+            GROUP BY 1, 2 ORDER BY 1, 2
+            ON CONFLICT (creator, "isStatic") DO UPDATE SET count = stats.count + EXCLUDED.count;
+        ELSE
+            INSERT INTO "codingLanguageStats" AS stats (creator, "isStatic", count)
+            SELECT creator, "isStatic", sum(delta) FROM (
+                SELECT coalesce(creator, '') AS creator, "isStatic", 1 AS delta FROM new_rows
+                UNION ALL
+                SELECT coalesce(creator, ''), "isStatic", -1 FROM old_rows
+            ) AS changes
+            GROUP BY 1, 2 HAVING sum(delta) <> 0 ORDER BY 1, 2
+            ON CONFLICT (creator, "isStatic") DO UPDATE SET count = stats.count + EXCLUDED.count;
+        END IF;
+        IF TG_OP <> 'INSERT' THEN
+            DELETE FROM "codingLanguageStats" WHERE count <= 0;
+        END IF;
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql;
+
+    CREATE TRIGGER coding_language_stats_insert AFTER INSERT ON "codingLanguage"
+        REFERENCING NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION count_coding_languages();
+    CREATE TRIGGER coding_language_stats_update AFTER UPDATE ON "codingLanguage"
+        REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION count_coding_languages();
+    CREATE TRIGGER coding_language_stats_delete AFTER DELETE ON "codingLanguage"
+        REFERENCING OLD TABLE AS old_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION count_coding_languages();
+    CREATE TRIGGER coding_language_stats_truncate AFTER TRUNCATE ON "codingLanguage"
+        FOR EACH STATEMENT EXECUTE FUNCTION count_coding_languages();
+"""
+
+# Run with writers blocked (DEDUP_LOCK), after the triggers exist
+BACKFILL_STATS = """
+    DELETE FROM "codingLanguageStats";
+    INSERT INTO "codingLanguageStats" (creator, "isStatic", count)
+    SELECT coalesce(creator, ''), "isStatic", count(*) FROM "codingLanguage" GROUP BY 1, 2;
+"""
+
+# Per-creator static and dynamic counts, largest creators first, with the
+# overall totals and number of creators repeated on every row. {source} has
+# (creator, "isStatic", count) rows.
+SELECT_STATS = """
+    SELECT NULLIF(creator, '') AS creator,
+           coalesce(sum(count) FILTER (WHERE "isStatic"), 0)::bigint AS static,
+           coalesce(sum(count) FILTER (WHERE NOT "isStatic"), 0)::bigint AS dynamic,
+           coalesce(sum(sum(count) FILTER (WHERE "isStatic")) OVER (), 0)::bigint AS total_static,
+           coalesce(sum(sum(count) FILTER (WHERE NOT "isStatic")) OVER (), 0)::bigint AS total_dynamic,
+           count(*) OVER () AS creators
+    FROM {source}
+    GROUP BY creator
+    ORDER BY sum(count) DESC, creator
+    LIMIT $1;
+"""
+
+SELECT_STATS_SUMMARY = SELECT_STATS.format(source='"codingLanguageStats"')
+
+# Before migration 6: the same numbers from a GROUP BY over every row
+SELECT_STATS_LIVE = SELECT_STATS.format(source="""(
+        SELECT coalesce(creator, '') AS creator, "isStatic", count(*) AS count
+        FROM "codingLanguage" GROUP BY 1, 2
+    ) AS counts""")
+
+# Cached results of TABLE_EXISTS and SCHEMA_FEATURES
+_table_exists = None
+_features = None
+
+
+class LanguageInput(BaseModel):
+    """One row for add_coding_languages_bulk"""
+    name: str
+    is_static: bool = False
+    creator: str = "system"
+
+
+class Language(BaseModel):
+    """One stored row, as the tools return it"""
+    id: int
+    name: str
+    is_static: bool
+    creator: str | None = None
+
+    @classmethod
+    def from_record(cls, record):
+        return cls(id=record['id'], name=record['name'], is_static=record['isStatic'], creator=record['creator'])
+
+
+def _parse_bool(value):
+    if isinstance(value, bool):
+        return value
+    text = str(value).strip().lower()
+    if text in ("true", "t", "yes", "y", "1", "static"):
+        return True
+    if text in ("false", "f", "no", "n", "0", "dynamic", ""):
+        return False
+    raise ValueError(f"not a boolean: {value!r}")
+
+
+def _language_from_record(record):
+    """Build a LanguageInput from a JSON object or CSV row"""
+    if not isinstance(record, dict):
+        raise ValueError("expected an object with a 'name' field")
+    name = (record.get("name") or "").strip()
+    if not name:
+        raise ValueError("missing 'name'")
+    is_static = record.get("is_static", record.get("isStatic", False))
+    creator = (record.get("creator") or "").strip() or "system"
+    return LanguageInput(name=name, is_static=_parse_bool(is_static), creator=creator)
+
+
+def parse_language_payload(payload, payload_format):
+    """Parse a JSON, JSONL or CSV payload into languages
+
+    Returns (languages, errors) where errors is a list of (row number, message)
+    for rows that could not be parsed. Row numbers are 1-based.
+    """
+    languages = []
+    errors = []
+
+    if payload_format == "json":
+        records = json.loads(payload)
+        if not isinstance(records, list):
+            raise ValueError("JSON payload must be an array of objects")
+        numbered = enumerate(records, 1)
+    elif payload_format == "jsonl":
+        numbered = []
+        for row, line in enumerate(payload.splitlines(), 1):
+            if not line.strip():
+                continue
+            try:
+                numbered.append((row, json.loads(line)))
+            except json.JSONDecodeError as e:
+                errors.append((row, f"invalid JSON: {e.msg}"))
+    elif payload_format == "csv":
+        numbered = enumerate(csv.DictReader(io.StringIO(payload)), 1)
+    else:
+        raise ValueError(f"Unknown payload format: {payload_format}")
+
+    for row, record in numbered:
+        try:
+            languages.append((row, _language_from_record(record)))
+        except ValueError as e:
+            errors.append((row, str(e)))
+
+    return languages, errors
+
+
+async def check_schema(conn):
+    """Look up whether the table exists and which migrations it has, and cache the answers"""
+    global _table_exists, _features
+    _table_exists = await conn.fetchval(TABLE_EXISTS)
+    _features = dict(await conn.fetchrow(SCHEMA_FEATURES))
+    return _table_exists
+
+
+async def table_exists(conn):
+    """Cached table existence, checked on first use if startup could not"""
+    if _table_exists is None:
+        return await check_schema(conn)
+    return _table_exists
+
+
+async def schema_features(conn):
+    """Cached {"name_index": bool, "request_table": bool, "trigram_index": bool, "stats_table": bool}"""
+    if _features is None:
+        await check_schema(conn)
+    return _features
+
+
+async def install_change_trigger(conn):
+    """Create the NOTIFY triggers on "codingLanguage" unless they already exist"""
+    async with conn.transaction():
+        await conn.execute(CHANGE_TRIGGER_LOCK)
+        await conn.execute(CREATE_CHANGE_FUNCTION)
+        await conn.execute(CREATE_CHANGE_TRIGGER)
+
+
+async def server_version(conn):
+    return await conn.fetchval(SERVER_VERSION)
+
+
+async def count_languages(conn):
+    return await conn.fetchval(COUNT_LANGUAGES)
+
+
+async def _insert_language_idempotent(conn, name, is_static, creator):
+    if (await schema_features(conn))["name_index"]:
+        for _ in range(2):
+            record = await conn.fetchrow(INSERT_LANGUAGE_IDEMPOTENT, name, is_static, creator)
+            if record is not None:
+                return record, record['created']
+        raise RuntimeError(f"Could not insert or find coding language {name!r}")
+
+    # Without the unique index, serialize adds of the name and look first
+    async with conn.transaction():
+        await conn.execute(NAME_LOCK, name)
+        record = await conn.fetchrow(SELECT_LANGUAGE_BY_NAME, name)
+        if record is not None:
+            return record, False
+        return await conn.fetchrow(INSERT_LANGUAGE, name, is_static, creator), True
+
+
+async def insert_language(conn, name, is_static, creator, idempotent=False, idempotency_key=None):
+    """Insert one language; returns (row, created)
+
+    With `idempotent`, a language whose normalized name already exists is
+    returned instead of inserted again. A repeated `idempotency_key` returns
+    the row added by the first call with that key; it needs the
+    "codingLanguageRequest" table from DEDUP_MIGRATION.
+    """
+    if idempotency_key is None:
+        if idempotent:
+            return await _insert_language_idempotent(conn, name, is_static, creator)
+        return await conn.fetchrow(INSERT_LANGUAGE, name, is_static, creator), True
+
+    async with conn.transaction():
+        await conn.execute(REQUEST_LOCK, idempotency_key)
+        record = await conn.fetchrow(SELECT_REQUEST, idempotency_key)
+        if record is not None:
+            return record, False
+        record, created = await insert_language(conn, name, is_static, creator, idempotent)
+        await conn.execute(INSERT_REQUEST, idempotency_key, record['id'])
+        return record, created
+
+
+async def count_duplicates(conn):
+    """Rows that share a normalized name with an older row"""
+    return await conn.fetchval(COUNT_DUPLICATES)
+
+
+async def find_duplicates(conn):
+    """(id, name, keep_id) for every row the dedup migration would remove"""
+    return await conn.fetch(SELECT_DUPLICATES)
+
+
+async def merge_duplicates(conn):
+    """Delete duplicate names, keeping the oldest row, then add the unique index
+
+    Runs in one transaction and returns the deleted (id, name, keep_id) rows.
+    """
+    async with conn.transaction():
+        await conn.execute(DEDUP_LOCK)
+        removed = await conn.fetch(DELETE_DUPLICATES)
+        await conn.execute(DEDUP_MIGRATION)
+    return removed
+
+
+async def insert_languages_bulk(conn, languages, batch_size=1000):
+    """Insert (row number, LanguageInput) pairs in one transaction
+
+    Rows go in batches of `batch_size` through a single multi-row
+    INSERT ... SELECT FROM unnest(...) each. Returns (inserted, conflicts):
+    inserted is a list of (row number, id) in input order and conflicts is
+    the list of row numbers skipped by ON CONFLICT DO NOTHING.
+    """
+    inserted = []
+    conflicts = []
+
+    async with conn.transaction():
+        for start in range(0, len(languages), batch_size):
+            batch = languages[start:start + batch_size]
+            returned = await conn.fetch(
+                INSERT_LANGUAGES_BULK,
+                [lang.name for _, lang in batch],
+                [lang.is_static for _, lang in batch],
+                [lang.creator for _, lang in batch],
+            )
+
+            # Match generated ids back to input rows; rows with no match conflicted
+            ids_by_value = {}
+            for record in returned:
+                key = (record['name'], record['isStatic'], record['creator'])
+                ids_by_value.setdefault(key, collections.deque()).append(record['id'])
+            for row, lang in batch:
+                ids = ids_by_value.get((lang.name, lang.is_static, lang.creator))
+                if ids:
+                    inserted.append((row, ids.popleft()))
+                else:
+                    conflicts.append(row)
+
+    return inserted, conflicts
+
+
+def _like_prefix(prefix):
+    """LIKE pattern matching values that start with `prefix` literally"""
+    escaped = prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return escaped + "%"
+
+
+def build_language_query(after_id=None, limit=None, is_static=None, creator=None, name_prefix=None):
+    """Keyset-paginated SELECT over "codingLanguage" with optional filters
+
+    Returns the SQL and its positional arguments. The SQL text depends only
+    on which filters are set, so each combination is prepared once.
+    """
+    conditions = []
+    args = []
+
+    if after_id is not None:
+        args.append(after_id)
+        conditions.append(f"id > ${len(args)}")
+    if is_static is not None:
+        args.append(is_static)
+        conditions.append(f'"isStatic" = ${len(args)}')
+    if creator is not None:
+        args.append(creator)
+        conditions.append(f"creator = ${len(args)}")
+    if name_prefix:
+        args.append(_like_prefix(name_prefix.lower()))
+        conditions.append(f"lower(name) LIKE ${len(args)}")
+
+    query = SELECT_LANGUAGES
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    query += " ORDER BY id"
+    if limit is not None:
+        args.append(limit)
+        query += f" LIMIT ${len(args)}"
+    return query, args
+
+
+def _tsquery(words, weights=""):
+    """tsquery text requiring every word as a word prefix, limited to `weights`
+
+    Lexemes are quoted so punctuation cannot break the syntax. One-letter
+    words must match whole: as prefixes they would match much of the table.
+    """
+    terms = []
+    for word in words:
+        flags = ("*" if len(word) > 1 else "") + weights
+        terms.append(f"'{word}':{flags}" if flags else f"'{word}'")
+    return " & ".join(terms) or None
+
+
+def build_search_query(query, limit, fuzzy=False):
+    """Ranked search over names and creators
+
+    Matches names starting with `query`, then names containing all of its
+    words (or word prefixes), then the same across name and creator, then,
+    with `fuzzy` (needs pg_trgm), names spelled similarly. Returns the SQL and
+    its positional arguments.
+    """
+    normalized = " ".join(query.lower().split())
+    words = re.findall(r"\w+", normalized)
+    sql = SEARCH_LANGUAGES.format(fuzzy=SEARCH_FUZZY if fuzzy else "")
+    return sql, [normalized, _like_prefix(normalized), _tsquery(words, "A"), _tsquery(words), limit]
+
+
+async def search_languages(conn, query, limit):
+    """Best matches for `query`, each with its match kind and score"""
+    features = await schema_features(conn)
+    sql, args = build_search_query(query, limit, fuzzy=features.get("trigram_index", False))
+    return await conn.fetch(sql, *args)
+
+
+async def language_stats(conn, limit):
+    """Counts per creator (the `limit` largest) with the overall totals
+
+    Reads the trigger-maintained summary table, so the cost depends on the
+    number of creators rather than of rows; before migration 6 it falls
+    back to a GROUP BY over the table.
+    """
+    features = await schema_features(conn)
+    sql = SELECT_STATS_SUMMARY if features.get("stats_table") else SELECT_STATS_LIVE
+    return await conn.fetch(sql, limit)
+
+
+async def fetch_languages(conn, after_id=None, limit=None, is_static=None, creator=None, name_prefix=None):
+    """One page of matching rows"""
+    query, args = build_language_query(after_id, limit, is_static, creator, name_prefix)
+    return await conn.fetch(query, *args)
+
+
+async def iter_languages(conn, after_id=None, limit=None, is_static=None, creator=None, name_prefix=None,
+                         prefetch=500):
+    """Stream matching rows through a server-side cursor in bounded memory
+
+    Must be called inside a transaction (asyncpg cursors require one).
+    """
+    query, args = build_language_query(after_id, limit, is_static, creator, name_prefix)
+    async for row in conn.cursor(query, *args, prefetch=prefetch):
+        yield row
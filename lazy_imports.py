@@ -0,0 +1,25 @@
+"""
+Deferred imports for dependencies that only some tools need
+"""
+import importlib.util
+import sys
+
+
+def lazy_import(name):
+    """Return module `name`, executed on first attribute access
+
+    Deployments that never call a tool using the module do not pay for
+    importing it at startup. Later `import name` statements get the same
+    module object.
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ModuleNotFoundError(f"No module named '{name}'", name=name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Load test for the async database tools
+
+Fires many concurrent MCP tool calls at the in-process server and records
+when each call starts and finishes. With the async database layer the calls
+overlap (peak in-flight > 1, wall time well below the sum of call times);
+with blocking tools they would run strictly one after another. Every call
+asks for a different page size, so none is answered by the language cache
+or by another call in flight, and each one queries the database.
+
+Usage:
+    DB_PASSWORD=... python load_test_db_tools.py [--calls 50] [--tool list_coding_languages]
+"""
+import argparse
+import asyncio
+import time
+
+import server
+
+# Arguments of the i-th call; a distinct limit per call defeats caching and coalescing
+CALL_ARGUMENTS = {
+    "list_coding_languages": lambda i: {"limit": i + 1},
+    "coding_language_stats": lambda i: {"limit": i + 1},
+}
+
+
+def peak_overlap(intervals):
+    """Largest number of calls that were in flight at the same moment"""
+    events = []
+    for start, end in intervals:
+        events.append((start, 1))
+        events.append((end, -1))
+    # Ends sort before starts at the same instant
+    events.sort(key=lambda e: (e[0], e[1]))
+
+    peak = current = 0
+    for _, delta in events:
+        current += delta
+        peak = max(peak, current)
+    return peak
+
+
+async def timed_call(tool, arguments, intervals):
+    start = time.perf_counter()
+    await server.mcp.call_tool(tool, arguments)
+    intervals.append((start, time.perf_counter()))
+
+
+async def run_load_test(tool, calls):
+    """Run `calls` concurrent invocations of `tool` and report the overlap"""
+    arguments = CALL_ARGUMENTS[tool]
+
+    print("⚡ Async Database Tools Load Test")
+    print("=" * 40)
+
+    async with server.server_lifespan():
+        # Warm the pool so connection setup does not dominate the numbers
+        await server.mcp.call_tool(tool, arguments(calls))
+
+        intervals = []
+        wall_start = time.perf_counter()
+        await asyncio.gather(*(timed_call(tool, arguments(i), intervals) for i in range(calls)))
+        wall_time = time.perf_counter() - wall_start
+
+    serial_time = sum(end - start for start, end in intervals)
+    peak = peak_overlap(intervals)
+
+    print(f"Tool: {tool}")
+    print(f"Calls: {calls}")
+    print(f"Wall time: {wall_time * 1000:.1f} ms")
+    print(f"Sum of call times: {serial_time * 1000:.1f} ms")
+    print(f"Peak calls in flight: {peak}")
+
+    if peak > 1:
+        print(f"\n✅ Calls overlapped ({serial_time / wall_time:.1f}x concurrency)")
+        return True
+
+    print("\n❌ Calls ran one after another")
+    return False
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tool", default="list_coding_languages", choices=sorted(CALL_ARGUMENTS))
+    parser.add_argument("--calls", type=int, default=50)
+    args = parser.parse_args()
+
+    success = asyncio.run(run_load_test(args.tool, args.calls))
+    raise SystemExit(0 if success else 1)
@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+Local stand-ins for PostgreSQL and wttr.in
+
+LocalPostgres creates a throwaway PostgreSQL cluster in a temporary directory
+with the "codingLanguage" schema from migrations.py, and removes it again on
+stop. It needs the PostgreSQL server binaries (initdb, pg_ctl, psql) on PATH
+or in PG_BIN.
+WeatherStub answers wttr.in requests from memory, with configurable latency
+and injected errors.
+
+Both expose env(), the variables that point server.py and the scripts here
+at them. Run a command against both with:
+
+    python local_services.py -- python load_test_db_tools.py --calls 100
+    python local_services.py --weather-latency 0.2 --weather-error-rate 0.1 -- python benchmark_tools.py
+
+Without a command it prints the variables and keeps both running until
+interrupted.
+"""
+import argparse
+import glob
+import http.server
+import json
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+
+MIGRATIONS_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "migrations.py")
+
+LOCAL_DB_NAME = "coding_languages"
+LOCAL_DB_USER = "postgres"
+LOCAL_DB_PASSWORD = "local"  # the cluster trusts local connections; tools only require one to be set
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class LocalPostgres:
+    """Throwaway PostgreSQL cluster with the "codingLanguage" schema
+
+    Usage:
+        with LocalPostgres() as pg:
+            os.environ.update(pg.env())
+    """
+
+    def __init__(self, bin_dir=None):
+        self.bin_dir = bin_dir or os.environ.get("PG_BIN") or self._find_bin_dir()
+        self.port = None
+        self.data_dir = None
+
+    @staticmethod
+    def _find_bin_dir():
+        candidates = []
+        initdb = shutil.which("initdb")
+        if initdb:
+            candidates.append(os.path.dirname(initdb))
+        pg_config = shutil.which("pg_config")
+        if pg_config:
+            candidates.append(subprocess.run([pg_config, "--bindir"], capture_output=True, text=True).stdout.strip())
+        # Debian and Ubuntu keep the server binaries off PATH
+        candidates += sorted(glob.glob("/usr/lib/postgresql/*/bin"), reverse=True)
+        for candidate in candidates:
+            if candidate and os.path.exists(os.path.join(candidate, "initdb")):
+                return candidate
+        raise RuntimeError("PostgreSQL server binaries not found: put initdb on PATH or set PG_BIN")
+
+    def _run(self, program, *args):
+        result = subprocess.run([os.path.join(self.bin_dir, program), *args],
+                                stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+        if result.returncode != 0:
+            raise RuntimeError(f"{program} failed: {result.stderr.strip()}")
+
+    def start(self):
+        self.data_dir = tempfile.mkdtemp(prefix="local-pg-")
+        self.port = free_port()
+        try:
+            self._run("initdb", "-D", self.data_dir, "-U", LOCAL_DB_USER, "-A", "trust", "--no-sync")
+            # Durability is irrelevant for a throwaway cluster, and costs write latency
+            options = (f"-p {self.port} -k {self.data_dir} -c listen_addresses=127.0.0.1 "
+                       "-c fsync=off -c synchronous_commit=off -c full_page_writes=off")
+            self._run("pg_ctl", "-D", self.data_dir, "-o", options, "-l", os.path.join(self.data_dir, "server.log"),
+                      "-w", "start")
+            psql = ["-h", "127.0.0.1", "-p", str(self.port), "-U", LOCAL_DB_USER, "-v", "ON_ERROR_STOP=1"]
+            self._run("psql", *psql, "-d", "postgres", "-c", f'CREATE DATABASE "{LOCAL_DB_NAME}";')
+        except Exception:
+            self.stop()
+            raise
+        # The schema comes from the same migrations as production
+        result = subprocess.run([sys.executable, MIGRATIONS_SCRIPT], env={**os.environ, **self.env()},
+                                stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+        if result.returncode != 0:
+            self.stop()
+            raise RuntimeError(f"migrations failed: {result.stderr.strip()}")
+        return self
+
+    def stop(self):
+        if self.data_dir is None:
+            return
+        if os.path.exists(os.path.join(self.data_dir, "postmaster.pid")):
+            subprocess.run([os.path.join(self.bin_dir, "pg_ctl"), "-D", self.data_dir, "-m", "immediate", "stop"],
+                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        shutil.rmtree(self.data_dir, ignore_errors=True)
+        self.data_dir = None
+
+    def env(self):
+        return {
+            "DB_HOST": "127.0.0.1",
+            "DB_PORT": str(self.port),
+            "DB_NAME": LOCAL_DB_NAME,
+            "DB_DATABASE": LOCAL_DB_NAME,  # db.py prefers the Sevalla names when set
+            "DB_USER": LOCAL_DB_USER,
+            "DB_USERNAME": LOCAL_DB_USER,
+            "DB_PASSWORD": LOCAL_DB_PASSWORD,
+        }
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+# Just the j1 fields get_current_weather(format="json") reads
+J1_REPORT = {
+    "current_condition": [{
+        "localObsDateTime": "2025-01-01 12:00 PM", "weatherDesc": [{"value": "Sunny"}], "temp_C": "21",
+        "FeelsLikeC": "23", "humidity": "40", "windspeedKmph": "10", "winddir16Point": "SW", "precipMM": "0.0",
+    }],
+    "nearest_area": [{"areaName": [{"value": "London"}], "country": [{"value": "United Kingdom"}]}],
+    "weather": [{"mintempC": "15", "maxtempC": "24"}],
+}
+
+
+class WeatherStub(http.server.ThreadingHTTPServer):
+    """wttr.in stand-in answering every GET with a fixed report
+
+    Each request waits `latency` seconds plus up to `jitter` more. A share
+    `error_rate` of requests is answered with `error_status` instead.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, latency=0.0, jitter=0.0, error_rate=0.0, error_status=503):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.requests = 0
+        self.errors = 0
+        super().__init__(("127.0.0.1", 0), _WeatherHandler)
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_port}"
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def env(self):
+        return {"WEATHER_BASE_URL": self.url}
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+class _WeatherHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body are separate writes; with Nagle's algorithm the body
+    # waits for the client's delayed ACK on keep-alive connections (~40 ms)
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        stub = self.server
+        time.sleep(stub.latency + random.uniform(0, stub.jitter))
+        stub.requests += 1
+        city, _, query = self.path.strip('/').partition('?')
+        if random.random() < stub.error_rate:
+            stub.errors += 1
+            status, content_type, body = stub.error_status, "text/plain; charset=utf-8", b"Injected error\n"
+        elif query == "format=j1":
+            status, content_type, body = 200, "application/json", json.dumps(J1_REPORT).encode()
+        else:
+            status, content_type = 200, "text/plain; charset=utf-8"
+            body = f"Weather report: {city}\n\n  \\  /   Sunny\n   .-.   +21(23) °C\n".encode()
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def main(args):
+    weather = WeatherStub(latency=args.weather_latency, jitter=args.weather_jitter,
+                          error_rate=args.weather_error_rate, error_status=args.weather_error_status)
+    postgres = None if args.no_db else LocalPostgres()
+    try:
+        weather.start()
+        env = weather.env()
+        if postgres:
+            env.update(postgres.start().env())
+
+        command = args.command[1:] if args.command[:1] == ["--"] else args.command
+        if command:
+            return subprocess.run(command, env={**os.environ, **env}).returncode
+
+        for name, value in env.items():
+            print(f"export {name}={value}")
+        print("# Local services running; press Ctrl-C to stop", file=sys.stderr)
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            pass
+        return 0
+    finally:
+        weather.stop()
+        if postgres:
+            postgres.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--no-db", action="store_true", help="only start the wttr.in stub")
+    parser.add_argument("--weather-latency", type=float, default=0.05, help="seconds the stub waits per request")
+    parser.add_argument("--weather-jitter", type=float, default=0.0, help="extra random wait of up to this many seconds")
+    parser.add_argument("--weather-error-rate", type=float, default=0.0, help="share of requests answered with an error")
+    parser.add_argument("--weather-error-status", type=int, default=503, help="status code of injected errors")
+    parser.add_argument("command", nargs=argparse.REMAINDER, help="command to run with the services, after --")
+    raise SystemExit(main(parser.parse_args()))
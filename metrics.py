@@ -0,0 +1,226 @@
+"""
+Prometheus-style metrics for the MCP server
+
+A small in-process registry rendered in the Prometheus text exposition
+format, plus the decorator that instruments every tool.
+"""
+import asyncio
+import functools
+import inspect
+import math
+import time
+
+# Default latency buckets in seconds (the Prometheus client defaults)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 7.5, 10.0)
+
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"') for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+def _format_value(value):
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._samples())
+        return lines
+
+    def _samples(self):
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+                for key, value in sorted(self._values.items())]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(self._key(labels), 0)
+
+
+class Gauge(_Metric):
+    """Gauge set directly, or computed at scrape time by `set_function`"""
+    kind = "gauge"
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._function = None
+
+    def set(self, value, **labels):
+        self._values[self._key(labels)] = value
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def value(self, **labels):
+        return self._values.get(self._key(labels), 0)
+
+    def set_function(self, function):
+        """Compute the samples on every scrape: `function()` returns {label tuple: value}"""
+        self._function = function
+
+    def _samples(self):
+        if self._function is not None:
+            self._values = dict(self._function())
+        return super()._samples()
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        state = self._values.get(key)
+        if state is None:
+            state = self._values[key] = {"counts": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                state["counts"][i] += 1
+                break
+        state["sum"] += value
+        state["count"] += 1
+
+    def count(self, **labels):
+        state = self._values.get(self._key(labels))
+        return state["count"] if state else 0
+
+    def _samples(self):
+        lines = []
+        for key, state in sorted(self._values.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, state["counts"]):
+                cumulative += bucket_count
+                labels = _format_labels(self.labelnames, key, [("le", _format_value(bound))])
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(state['sum'])}")
+            lines.append(f"{self.name}_count{labels} {state['count']}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+
+    def register(self, metric):
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format"""
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+TOOL_CALLS = REGISTRY.counter("mcp_tool_calls_total", "Tool calls started", ["tool"])
+TOOL_ERRORS = REGISTRY.counter("mcp_tool_errors_total", "Tool calls that raised or returned an error", ["tool"])
+TOOL_CALLS_COALESCED = REGISTRY.counter("mcp_tool_calls_coalesced_total",
+                                        "Tool calls answered by an identical call already in flight", ["tool"])
+TOOL_DURATION = REGISTRY.histogram("mcp_tool_duration_seconds", "Tool call latency", ["tool"])
+ACTIVE_SESSIONS = REGISTRY.gauge("mcp_active_sessions", "MCP client sessions currently connected")
+EVENT_LOOP_LAG = REGISTRY.gauge("event_loop_lag_seconds", "Delay of the last event loop heartbeat")
+HTTP_DURATION = REGISTRY.histogram("http_client_request_duration_seconds", "Outbound HTTP request latency", ["host"])
+HTTP_REQUESTS = REGISTRY.counter("http_client_requests_total", "Outbound HTTP requests by result", ["host", "status"])
+DB_POOL = REGISTRY.gauge("db_pool_connections", "Database pool connections by state", ["state"])
+LIMIT_IN_FLIGHT = REGISTRY.gauge("mcp_limit_in_flight", "Tool calls running under a concurrency limit", ["limit"])
+LIMIT_QUEUED = REGISTRY.gauge("mcp_limit_queued", "Tool calls waiting for a slot under a concurrency limit", ["limit"])
+LIMIT_QUEUE_WAIT = REGISTRY.histogram("mcp_limit_queue_wait_seconds", "Time tool calls waited for a slot", ["limit"])
+LIMIT_REJECTED = REGISTRY.counter("mcp_limit_rejected_total", "Tool calls rejected as busy", ["limit", "reason"])
+CIRCUIT_STATE = REGISTRY.gauge("circuit_breaker_state", "Circuit breaker state (0 closed, 1 half-open, 2 open)", ["breaker"])
+CIRCUIT_TRANSITIONS = REGISTRY.counter("circuit_breaker_transitions_total", "Circuit breaker state changes by new state",
+                                       ["breaker", "state"])
+LOG_RECORDS_DROPPED = REGISTRY.counter("log_records_dropped_total", "Log records dropped because the log queue was full")
+
+# Content type for the text exposition format
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def instrument_tool(fn, is_error=None, on_call=None):
+    """Wrap a tool function to record calls, errors and latency
+
+    The wrapper is always async and keeps the signature of `fn`, so FastMCP
+    builds the same input schema. `is_error(result)` flags results that
+    report a failure without raising. `on_call(tool, duration, outcome)` runs
+    after every call with outcome "ok", "error", "exception" or "cancelled".
+    """
+    tool = fn.__name__
+
+    @functools.wraps(fn)
+    async def wrapper(*args, **kwargs):
+        TOOL_CALLS.inc(tool=tool)
+        start = time.perf_counter()
+        outcome = "exception"
+        try:
+            result = fn(*args, **kwargs)
+            if inspect.isawaitable(result):
+                result = await result
+            outcome = "error" if is_error is not None and is_error(result) else "ok"
+        except asyncio.CancelledError:
+            outcome = "cancelled"
+            raise
+        finally:
+            duration = time.perf_counter() - start
+            TOOL_DURATION.observe(duration, tool=tool)
+            if outcome in ("error", "exception"):
+                TOOL_ERRORS.inc(tool=tool)
+            if on_call is not None:
+                on_call(tool, duration, outcome)
+        return result
+
+    return wrapper
+
+
+async def monitor_event_loop(interval=0.5):
+    """Record how late the event loop wakes up; run as a background task"""
+    while True:
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        EVENT_LOOP_LAG.set(max(0.0, time.perf_counter() - start - interval))
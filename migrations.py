@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Versioned schema migrations for the "codingLanguage" table
+
+Each migration has a version number and is applied once, in order, in its
+own transaction; applied versions are recorded in schema_migrations. A
+session advisory lock lets several server processes start at once without
+applying anything twice. The server runs pending migrations at startup
+(DB_MIGRATE_ON_STARTUP); the same can be done from the command line.
+
+Usage:
+    python migrations.py            # apply pending migrations
+    python migrations.py --status   # list applied and pending migrations
+"""
+import argparse
+import asyncio
+import logging
+
+import db
+import language_repository as repo
+
+logger = logging.getLogger("demo-mcp-server.migrations")
+
+CREATE_MIGRATIONS_TABLE = """
+    CREATE TABLE IF NOT EXISTS schema_migrations (
+        version INTEGER PRIMARY KEY,
+        name TEXT NOT NULL,
+        applied_at TIMESTAMPTZ NOT NULL DEFAULT now()
+    );
+"""
+
+SELECT_APPLIED = "SELECT version FROM schema_migrations ORDER BY version;"
+
+RECORD_MIGRATION = "INSERT INTO schema_migrations (version, name) VALUES ($1, $2);"
+
+# Held for the whole run, so concurrent runners wait instead of racing
+MIGRATION_LOCK = "SELECT pg_advisory_lock(hashtext('schema_migrations'));"
+MIGRATION_UNLOCK = "SELECT pg_advisory_unlock(hashtext('schema_migrations'));"
+
+
+class MigrationSkipped(Exception):
+    """A migration's prerequisite is missing; it stays pending and is retried on the next run"""
+
+
+async def _create_table(conn):
+    await conn.execute(repo.CREATE_TABLE)
+
+
+async def _unique_names(conn):
+    # Deleting rows is left to dedupe_languages.py rather than done at startup;
+    # the later migrations do not need unique names and still run
+    duplicates = await repo.count_duplicates(conn)
+    if duplicates:
+        raise MigrationSkipped(f"{duplicates} rows have duplicate names; run python dedupe_languages.py")
+    await conn.execute(repo.DEDUP_MIGRATION)
+
+
+async def _listing_indexes(conn):
+    await conn.execute(repo.CREATE_LISTING_INDEXES)
+
+
+async def _search_index(conn):
+    await conn.execute(repo.CREATE_SEARCH_INDEX)
+
+
+async def _trigram_index(conn):
+    # Search works without it, minus the fuzzy matches
+    if not await conn.fetchval(repo.TRIGRAM_AVAILABLE):
+        raise MigrationSkipped("the pg_trgm extension is not installed on the database server")
+    try:
+        async with conn.transaction():
+            await conn.execute(repo.CREATE_TRIGRAM_INDEX)
+    except db.asyncpg.InsufficientPrivilegeError:
+        raise MigrationSkipped("not allowed to create the pg_trgm extension; ask an administrator to create it")
+
+
+async def _stats_table(conn):
+    await conn.execute(repo.CREATE_STATS_TABLE)
+    # Writes committed between the backfill and the end of this transaction
+    # would otherwise be counted twice or not at all
+    await conn.execute(repo.DEDUP_LOCK)
+    await conn.execute(repo.BACKFILL_STATS)
+
+
+# (version, name, apply(conn)); append new migrations, never renumber
+MIGRATIONS = [
+    (1, "create codingLanguage table", _create_table),
+    (2, "unique normalized names and idempotency keys", _unique_names),
+    (3, "indexes for the listing filters", _listing_indexes),
+    (4, "full-text search index", _search_index),
+    (5, "trigram index for fuzzy search (pg_trgm)", _trigram_index),
+    (6, "creator and type counts kept by triggers", _stats_table),
+]
+
+
+async def applied_versions(conn):
+    await conn.execute(CREATE_MIGRATIONS_TABLE)
+    return {record['version'] for record in await conn.fetch(SELECT_APPLIED)}
+
+
+async def migrate(conn):
+    """Apply pending migrations in order and return the versions applied
+
+    Stops at the first migration that fails; the ones before it stay applied.
+    Skipped migrations stay pending and the later ones are still applied.
+    """
+    applied = []
+    await conn.execute(MIGRATION_LOCK)
+    try:
+        done = await applied_versions(conn)
+        for version, name, apply in MIGRATIONS:
+            if version in done:
+                continue
+            try:
+                async with conn.transaction():
+                    await apply(conn)
+                    await conn.execute(RECORD_MIGRATION, version, name)
+            except MigrationSkipped as e:
+                logger.warning("Skipped migration %d (%s): %s", version, name, e)
+                continue
+            logger.info("Applied migration %d: %s", version, name)
+            applied.append(version)
+    finally:
+        await conn.execute(MIGRATION_UNLOCK)
+    return applied
+
+
+async def _run(status):
+    try:
+        async with db.get_db_connection() as conn:
+            if status:
+                return await applied_versions(conn), []
+            applied = await migrate(conn)
+            return await applied_versions(conn), applied
+    finally:
+        await db.close_pool()
+
+
+def run_migrations(status=False):
+    print("🗂️  Schema Migrations")
+    print("=" * 40)
+
+    if not db.DB_PASSWORD:
+        print("❌ DB_PASSWORD not configured")
+        return False
+
+    try:
+        done, applied = asyncio.run(_run(status))
+    except Exception as e:
+        print(f"❌ Database error: {str(e)}")
+        return False
+
+    for version, name, _ in MIGRATIONS:
+        state = "applied now" if version in applied else "applied" if version in done else "pending"
+        print(f"   {version:>3}  {name:<44} {state}")
+    return True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--status", action="store_true", help="only list applied and pending migrations")
+    args = parser.parse_args()
+    raise SystemExit(0 if run_migrations(args.status) else 1)
@@ -0,0 +1,332 @@
+"""
+Multi-process HTTP deployment with sticky sessions
+
+Starts N copies of server.py on loopback ports, each with its own database
+pool, HTTP client and caches, and serves a small router on PORT in front of
+them. An MCP SSE session only exists inside the worker that opened the /sse
+stream, so the router reads the session id from the stream's `endpoint`
+event and sends every /messages/ POST for that session to the same worker.
+Streamable HTTP requests are routed the same way by their mcp-session-id
+header; stateless ones carry none and go to the least busy worker.
+
+On SIGTERM the router stops accepting connections, lets open sessions finish
+for up to the drain timeout, then stops the workers the same way.
+"""
+import asyncio
+import logging
+import os
+import re
+import signal
+import subprocess
+import sys
+import time
+from contextlib import asynccontextmanager
+
+import httpx
+import uvicorn
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse, Response, StreamingResponse
+from starlette.routing import Route
+
+import structured_logging
+
+logger = logging.getLogger("demo-mcp-server.multiworker")
+
+SERVER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "server.py")
+
+# Worker configuration
+MCP_WORKER_BASE_PORT = int(os.environ.get('MCP_WORKER_BASE_PORT', 0))  # first loopback worker port; 0 means PORT + 1
+MCP_WORKER_START_TIMEOUT = float(os.environ.get('MCP_WORKER_START_TIMEOUT', 30))  # seconds to wait for a worker to answer
+
+# The FastMCP SSE transport announces the POST endpoint as /messages/?session_id=<hex>.
+# The id must end with its line, so an id split across two chunks is not read
+# before its last digits arrive.
+SESSION_ID_PATTERN = re.compile(rb"session_id=([0-9a-fA-F]+)\r?\n")
+
+# Hop-by-hop headers are not forwarded in either direction
+HOP_BY_HOP_HEADERS = {"connection", "keep-alive", "transfer-encoding", "te", "trailer", "upgrade", "host",
+                      "content-length"}
+
+
+def worker_count(value):
+    """Parse MCP_WORKERS: a number, or 'auto' for one worker per CPU"""
+    if str(value).strip().lower() == "auto":
+        return os.cpu_count() or 1
+    return max(1, int(value))
+
+
+class Worker:
+    """One server.py process serving MCP over HTTP on a loopback port"""
+
+    def __init__(self, index, port):
+        self.index = index
+        self.port = port
+        self.url = f"http://127.0.0.1:{port}"
+        self.process = None
+        self.streams = 0  # open /sse streams and /mcp requests routed here
+
+    def start(self, drain_timeout):
+        env = dict(
+            os.environ,
+            PORT=str(self.port),
+            FASTMCP_HOST="127.0.0.1",
+            MCP_WORKERS="1",
+            MCP_WORKER_ID=str(self.index),
+            SHUTDOWN_DRAIN_TIMEOUT=str(drain_timeout),
+        )
+        # Own session, so a Ctrl+C in the terminal reaches only the router,
+        # which then stops the workers in order
+        self.process = subprocess.Popen([sys.executable, SERVER_SCRIPT], env=env, start_new_session=True)
+        logger.info("Started worker %d (pid %d) on port %d", self.index, self.process.pid, self.port)
+
+    def running(self):
+        return self.process is not None and self.process.poll() is None
+
+    async def wait_ready(self, client, timeout):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if not self.running():
+                raise RuntimeError(f"Worker {self.index} exited with code {self.process.returncode}")
+            try:
+                response = await client.get(f"{self.url}/metrics", timeout=1)
+                if response.status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.1)
+        raise RuntimeError(f"Worker {self.index} did not start within {timeout:.0f}s")
+
+    def signal(self, signum):
+        if self.running():
+            self.process.send_signal(signum)
+
+
+class Router:
+    """Starlette app that pins each MCP session to one worker"""
+
+    def __init__(self, workers, drain_timeout):
+        self.workers = workers
+        self.drain_timeout = drain_timeout
+        self.sessions = {}  # session id -> Worker
+        self.client = None
+        self.stopping = False
+        self.app = Starlette(
+            routes=[
+                Route("/sse", endpoint=self.proxy_sse, methods=["GET"]),
+                Route("/messages/", endpoint=self.proxy_message, methods=["POST"]),
+                Route("/mcp", endpoint=self.proxy_mcp, methods=["GET", "POST", "DELETE"]),
+                Route("/metrics", endpoint=self.metrics, methods=["GET"]),
+            ],
+            lifespan=self.lifespan,
+        )
+
+    @asynccontextmanager
+    async def lifespan(self, app):
+        # SSE streams hold their upstream connection open indefinitely
+        self.client = httpx.AsyncClient(
+            timeout=httpx.Timeout(10, read=None),
+            limits=httpx.Limits(max_connections=None, max_keepalive_connections=len(self.workers) * 4),
+        )
+        for worker in self.workers:
+            worker.start(self.drain_timeout)
+        supervisor = None
+        try:
+            await asyncio.gather(*(w.wait_ready(self.client, MCP_WORKER_START_TIMEOUT) for w in self.workers))
+            logger.info("%d workers ready", len(self.workers))
+            supervisor = asyncio.create_task(self.supervise())
+            yield
+        finally:
+            self.stopping = True
+            if supervisor is not None:
+                supervisor.cancel()
+            await self.stop_workers()
+            await self.client.aclose()
+
+    async def supervise(self):
+        """Restart workers that exit on their own; their sessions are lost"""
+        while True:
+            await asyncio.sleep(1)
+            for worker in self.workers:
+                if not worker.running() and not self.stopping:
+                    logger.error("Worker %d exited with code %s, restarting", worker.index, worker.process.returncode)
+                    for session_id in [s for s, w in self.sessions.items() if w is worker]:
+                        del self.sessions[session_id]
+                    worker.start(self.drain_timeout)
+
+    async def stop_workers(self):
+        """SIGTERM every worker, then SIGKILL whatever outlives the drain timeout"""
+        for worker in self.workers:
+            worker.signal(signal.SIGTERM)
+        deadline = time.monotonic() + self.drain_timeout + 5
+        while any(w.running() for w in self.workers) and time.monotonic() < deadline:
+            await asyncio.sleep(0.1)
+        for worker in self.workers:
+            if worker.running():
+                logger.warning("Worker %d did not stop in time, killing", worker.index)
+                worker.signal(signal.SIGKILL)
+        logger.info("All workers stopped")
+
+    def pick_worker(self):
+        """Least open streams first, so sessions spread across processes"""
+        available = [w for w in self.workers if w.running()]
+        if not available:
+            return None
+        return min(available, key=lambda w: (w.streams, w.index))
+
+    @staticmethod
+    def _forward_headers(headers):
+        return {k: v for k, v in headers.items() if k.lower() not in HOP_BY_HOP_HEADERS}
+
+    async def proxy_sse(self, request):
+        worker = self.pick_worker()
+        if worker is None or self.stopping:
+            return PlainTextResponse("Server is shutting down", status_code=503)
+
+        # Count the stream before connecting so concurrent clients spread out
+        worker.streams += 1
+        upstream_request = self.client.build_request(
+            "GET", f"{worker.url}/sse", headers=self._forward_headers(request.headers)
+        )
+        try:
+            upstream = await self.client.send(upstream_request, stream=True)
+        except httpx.TransportError as e:
+            worker.streams -= 1
+            logger.error("Worker %d unreachable: %s", worker.index, e)
+            return PlainTextResponse("Worker unavailable", status_code=502)
+
+        async def relay():
+            session_id = None
+            head = b""
+            try:
+                async for chunk in upstream.aiter_raw():
+                    # The first event names the session; remember which worker owns it
+                    if session_id is None:
+                        head += chunk
+                        match = SESSION_ID_PATTERN.search(head)
+                        if match:
+                            session_id = match.group(1).decode()
+                            self.sessions[session_id] = worker
+                            head = b""
+                    yield chunk
+            finally:
+                worker.streams -= 1
+                if session_id is not None and self.sessions.get(session_id) is worker:
+                    del self.sessions[session_id]
+                await upstream.aclose()
+
+        return StreamingResponse(relay(), status_code=upstream.status_code,
+                                 headers=self._forward_headers(upstream.headers))
+
+    async def proxy_message(self, request):
+        worker = self.sessions.get(request.query_params.get("session_id", ""))
+        if worker is None:
+            return PlainTextResponse("Could not find session", status_code=404)
+
+        try:
+            upstream = await self.client.post(
+                f"{worker.url}/messages/",
+                params=request.query_params,
+                content=await request.body(),
+                headers=self._forward_headers(request.headers),
+            )
+        except httpx.TransportError as e:
+            logger.error("Worker %d unreachable: %s", worker.index, e)
+            return PlainTextResponse("Worker unavailable", status_code=502)
+        return Response(upstream.content, status_code=upstream.status_code,
+                        headers=self._forward_headers(upstream.headers))
+
+    async def proxy_mcp(self, request):
+        """Streamable HTTP: stateless calls go anywhere, sessions stay on the worker that issued them"""
+        session_id = request.headers.get("mcp-session-id")
+        if session_id:
+            worker = self.sessions.get(session_id)
+            if worker is None:
+                return PlainTextResponse("Could not find session", status_code=404)
+        else:
+            worker = self.pick_worker()
+            if worker is None or self.stopping:
+                return PlainTextResponse("Server is shutting down", status_code=503)
+
+        worker.streams += 1
+        upstream_request = self.client.build_request(
+            request.method,
+            f"{worker.url}/mcp",
+            params=request.query_params,
+            content=await request.body(),
+            headers=self._forward_headers(request.headers),
+        )
+        try:
+            upstream = await self.client.send(upstream_request, stream=True)
+        except httpx.TransportError as e:
+            worker.streams -= 1
+            logger.error("Worker %d unreachable: %s", worker.index, e)
+            return PlainTextResponse("Worker unavailable", status_code=502)
+
+        issued = upstream.headers.get("mcp-session-id")
+        if issued:
+            self.sessions[issued] = worker
+        if session_id and (request.method == "DELETE" or upstream.status_code == 404):
+            self.sessions.pop(session_id, None)
+
+        # The reply may be an SSE stream of progress and results, so relay it as it arrives
+        async def relay():
+            try:
+                async for chunk in upstream.aiter_raw():
+                    yield chunk
+            finally:
+                worker.streams -= 1
+                await upstream.aclose()
+
+        return StreamingResponse(relay(), status_code=upstream.status_code,
+                                 headers=self._forward_headers(upstream.headers))
+
+    async def metrics(self, request):
+        """Every worker's metrics in one scrape, labelled by worker"""
+        async def scrape(worker):
+            try:
+                response = await self.client.get(f"{worker.url}/metrics", timeout=5)
+                return worker.index, response.text if response.status_code == 200 else ""
+            except httpx.TransportError:
+                return worker.index, ""
+
+        texts = await asyncio.gather(*(scrape(w) for w in self.workers))
+        return Response(merge_metrics(texts), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+def _add_worker_label(sample, index):
+    name, _, rest = sample.partition(" ")
+    if "{" in name:
+        metric, _, labels = name.partition("{")
+        return f'{metric}{{worker="{index}",{labels} {rest}'
+    return f'{name}{{worker="{index}"}} {rest}'
+
+
+def merge_metrics(texts):
+    """Combine (worker index, exposition text) pairs, keeping each family together"""
+    families = {}
+    for index, text in texts:
+        family = None
+        for line in text.splitlines():
+            if not line:
+                continue
+            if line.startswith("# "):
+                parts = line.split(" ", 3)
+                family = families.setdefault(parts[2], {"header": [], "samples": []})
+                if len(family["header"]) < 2 and line not in family["header"]:
+                    family["header"].append(line)
+            elif family is not None:
+                family["samples"].append(_add_worker_label(line, index))
+
+    lines = []
+    for family in families.values():
+        lines.extend(family["header"])
+        lines.extend(family["samples"])
+    return "\n".join(lines) + "\n"
+
+
+def run(workers, host, port, drain_timeout, log_level="info"):
+    """Serve the router on host:port in front of `workers` server processes"""
+    base_port = MCP_WORKER_BASE_PORT or port + 1
+    router = Router([Worker(i, base_port + i) for i in range(workers)], drain_timeout)
+    uvicorn.run(router.app, host=host, port=port, log_level=log_level, log_config=None,
+                access_log=structured_logging.LOG_REQUESTS, timeout_graceful_shutdown=drain_timeout)
@@ -1,250 +1,945 @@
+import asyncio
+import base64
+import inspect
+import json
 import logging
 import os
 import random
+import re
+import signal
 import sys
+import uuid
+from contextlib import asynccontextmanager
 from datetime import datetime
+from typing import Literal
+from urllib.parse import quote
 
-import requests
-import psycopg2
-from psycopg2.extras import RealDictCursor
+import anyio
+import httpx
+import uvicorn
 from dotenv import load_dotenv
 from mcp.server.fastmcp import FastMCP
+from mcp.server.fastmcp.exceptions import ToolError
+from mcp.types import TextContent, ToolAnnotations
+from pydantic import BaseModel
+from starlette.responses import Response
+from starlette.routing import Route
+
+import bulkhead
+import db
+import http_client
+import language_repository
+import metrics
+import migrations
+import multiworker
+import structured_logging
+from cache import TTLCache
+from circuit_breaker import CircuitOpen
+from language_repository import LIST_DEFAULT_LIMIT, SEARCH_DEFAULT_LIMIT, Language, LanguageInput, parse_language_payload
+from db import DB_HOST, DB_PORT, DB_NAME, DB_USER, DB_PASSWORD, get_db_connection
+from lazy_imports import lazy_import
+from single_flight import coalesce
+
+# Only the database tools need asyncpg; it is loaded when they first run
+asyncpg = lazy_import("asyncpg")
 
 # Load environment variables from .env file
 load_dotenv()
 
 name="demo-mcp-server"
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(name)s - %(levelname)s - %(message)s',
-    handlers=[logging.StreamHandler()]
-)
+# Configure logging: JSON records written by a background thread
+structured_logging.configure_logging()
 logger = logging.getLogger(name)
 
 # Get port from environment variable or use 8080 as default
 port = int(os.environ.get('PORT', 8080))
+host = os.environ.get('FASTMCP_HOST', '0.0.0.0')
+
+# Transport: 'sse', 'streamable-http' or 'stdio'; defaults to SSE when PORT is set, stdio otherwise
+MCP_TRANSPORT = os.environ.get('MCP_TRANSPORT', 'sse' if os.environ.get('PORT') else 'stdio')
+MCP_STATELESS_HTTP = os.environ.get('MCP_STATELESS_HTTP', 'true').lower() == 'true'  # streamable HTTP without per-client sessions
+MCP_JSON_RESPONSE = os.environ.get('MCP_JSON_RESPONSE', 'false').lower() == 'true'  # plain JSON replies instead of an SSE stream per call
+# Text block sent next to structuredContent: 'compact' JSON, 'indented' JSON (as FastMCP sends it) or 'none'
+STRUCTURED_TEXT = os.environ.get('STRUCTURED_TEXT', 'compact')
+
+# Process configuration for the HTTP transports
+MCP_WORKERS = multiworker.worker_count(os.environ.get('MCP_WORKERS', 1))  # server processes behind one port; 'auto' is one per CPU
+SHUTDOWN_DRAIN_TIMEOUT = float(os.environ.get('SHUTDOWN_DRAIN_TIMEOUT', 10))  # seconds open sessions get to finish after SIGTERM
+
+# Optional tool groups: 'basic' (add, get_secret_word, get_current_time), 'weather' and 'database'
+TOOL_GROUPS = ("basic", "weather", "database")
+MCP_TOOL_GROUPS = {group.strip() for group in os.environ.get('MCP_TOOL_GROUPS', ','.join(TOOL_GROUPS)).split(',') if group.strip()}
+for unknown_group in sorted(MCP_TOOL_GROUPS - set(TOOL_GROUPS)):
+    logger.warning("Ignoring unknown tool group in MCP_TOOL_GROUPS: %s", unknown_group)
+
+# Weather service endpoint (benchmarks point this at a local stub)
+WEATHER_BASE_URL = os.environ.get('WEATHER_BASE_URL', 'https://wttr.in').rstrip('/')
+
+# wttr.in query string per get_current_weather format; '0' is today only, 'T' turns off terminal colours
+WEATHER_FORMATS = {
+    "oneline": "format=" + quote("%l: %C %t (feels like %f), wind %w, humidity %h, precipitation %p"),
+    "current": "0T",
+    "json": "format=j1",
+    "full": "T",
+}
+
+# Colour and cursor sequences, in case wttr.in sends them anyway
+ANSI_ESCAPE = re.compile(r"\x1b\[[0-9;?]*[A-Za-z]")
+
+# Failures of a single report fetch: network, circuit open or an unparsable j1
+# document (missing keys, empty lists, unexpected nulls)
+WEATHER_ERRORS = (httpx.HTTPError, CircuitOpen, ValueError, LookupError, TypeError)
+
+# get_weather_many limits
+WEATHER_BATCH_MAX_CITIES = int(os.environ.get('WEATHER_BATCH_MAX_CITIES', 50))  # cities per call
+WEATHER_BATCH_CONCURRENCY = int(os.environ.get('WEATHER_BATCH_CONCURRENCY', 10))  # cities fetched at once per call
+
+# Weather cache configuration
+WEATHER_CACHE_TTL = float(os.environ.get('WEATHER_CACHE_TTL', 60))  # seconds a report is fresh
+WEATHER_CACHE_STALE_TTL = float(os.environ.get('WEATHER_CACHE_STALE_TTL', 300))  # seconds an expired report may still be served while refreshing
+WEATHER_CACHE_MAX_SIZE = int(os.environ.get('WEATHER_CACHE_MAX_SIZE', 256))  # cities kept in memory
+
+weather_cache = TTLCache("weather", ttl=WEATHER_CACHE_TTL, max_size=WEATHER_CACHE_MAX_SIZE,
+                         stale_ttl=WEATHER_CACHE_STALE_TTL)
+
+# Listing configuration
+LIST_MAX_LIMIT = int(os.environ.get('LIST_MAX_LIMIT', 10000))  # rows per page
+LIST_CACHE_MAX_PAGE = int(os.environ.get('LIST_CACHE_MAX_PAGE', 1000))  # pages larger than this are not cached
+
+# Search configuration
+SEARCH_MAX_LIMIT = int(os.environ.get('SEARCH_MAX_LIMIT', 100))  # matches per search_coding_languages call
+
+# Statistics configuration
+STATS_DEFAULT_LIMIT = 100
+STATS_MAX_LIMIT = int(os.environ.get('STATS_MAX_LIMIT', 1000))  # creators per coding_language_stats call
+
+# Listing cache configuration
+LIST_CACHE_MAX_STALENESS = float(os.environ.get('LIST_CACHE_MAX_STALENESS', 30))  # oldest snapshot served while the database is up, in seconds; 0 disables caching
+LIST_CACHE_OUTAGE_MAX_AGE = float(os.environ.get('LIST_CACHE_OUTAGE_MAX_AGE', 300))  # oldest snapshot served while the database breaker is open, in seconds
+LIST_CACHE_MAX_SIZE = int(os.environ.get('LIST_CACHE_MAX_SIZE', 128))  # pages and filter combinations kept in memory
+LIST_CACHE_NOTIFY = os.environ.get('LIST_CACHE_NOTIFY', 'true').lower() == 'true'  # invalidate on writes from other processes via LISTEN/NOTIFY
+
+# While the database is up expired snapshots are never served, so max staleness
+# is simply the TTL; _cached_during_outage allows older ones up to a limit
+language_cache = TTLCache("languages", ttl=LIST_CACHE_MAX_STALENESS, max_size=LIST_CACHE_MAX_SIZE)
+
+# Apply pending schema migrations (migrations.py) when the server starts
+DB_MIGRATE_ON_STARTUP = os.environ.get('DB_MIGRATE_ON_STARTUP', 'true').lower() == 'true'
+
+# Bulk insert configuration
+BULK_MAX_ROWS = int(os.environ.get('BULK_MAX_ROWS', 50000))  # rows per add_coding_languages_bulk call
+BULK_BATCH_SIZE = int(os.environ.get('BULK_BATCH_SIZE', 1000))  # rows per INSERT statement
+
+# Concurrency limits: calls running at once, calls allowed to wait for a slot and for how long
+WEATHER_MAX_CONCURRENCY = int(os.environ.get('WEATHER_MAX_CONCURRENCY', 20))
+WEATHER_MAX_QUEUE = int(os.environ.get('WEATHER_MAX_QUEUE', 100))
+DB_MAX_CONCURRENCY = int(os.environ.get('DB_MAX_CONCURRENCY', db.DB_POOL_MAX_SIZE))  # shared by all database tools
+DB_MAX_QUEUE = int(os.environ.get('DB_MAX_QUEUE', 50))
+TOOL_QUEUE_TIMEOUT = float(os.environ.get('TOOL_QUEUE_TIMEOUT', 5))  # seconds a call may wait before it is rejected as busy
+
+weather_limit = bulkhead.create("weather", WEATHER_MAX_CONCURRENCY, WEATHER_MAX_QUEUE, TOOL_QUEUE_TIMEOUT)
+database_limit = bulkhead.create("database", DB_MAX_CONCURRENCY, DB_MAX_QUEUE, TOOL_QUEUE_TIMEOUT)
+
+
+async def prepare_database():
+    """Open the pool, migrate and check the schema in the background
+
+    Tools wait for the same pool if they run first, so startup does not
+    have to.
+    """
+    try:
+        await db.init_pool()
+        async with get_db_connection() as conn:
+            if DB_MIGRATE_ON_STARTUP:
+                await migrations.migrate(conn)
+            if await language_repository.check_schema(conn) and LIST_CACHE_NOTIFY:
+                await language_repository.install_change_trigger(conn)
+    except Exception as e:
+        # Tools retry lazily, so a cold database must not stop the server
+        logger.error("Database pool initialization failed: %s", e)
 
-# Database configuration - Using external connection
-# Updated to match Sevalla's environment variable names
-DB_HOST = os.environ.get('DB_HOST', 'northamerica-northeast1-001.proxy.kinsta.app')
-DB_PORT = os.environ.get('DB_PORT', '30888')
-DB_NAME = os.environ.get('DB_DATABASE', os.environ.get('DB_NAME', 'spiritual-orange-blackbird'))  # Sevalla uses DB_DATABASE
-DB_USER = os.environ.get('DB_USERNAME', os.environ.get('DB_USER', 'marmoset'))  # Sevalla uses DB_USERNAME
-DB_PASSWORD = os.environ.get('DB_PASSWORD', '')  # Same in both
 
-def get_db_connection():
-    """Get database connection"""
+@asynccontextmanager
+async def server_lifespan():
+    """Start background work once per process and release shared resources on shutdown
+
+    The HTTP client is created on the first outbound request.
+    """
+    background = [asyncio.create_task(metrics.monitor_event_loop())]
+    if DB_PASSWORD and "database" in MCP_TOOL_GROUPS:
+        background.append(asyncio.create_task(prepare_database()))
+        if LIST_CACHE_NOTIFY:
+            background.append(asyncio.create_task(db.listen(
+                language_repository.CHANGE_CHANNEL,
+                on_notify=lambda payload: language_cache.invalidate(),
+                on_connect=language_cache.invalidate,
+            )))
     try:
-        # Log connection attempt (without password for security)
-        logger.info(f"Attempting database connection to {DB_HOST}:{DB_PORT}/{DB_NAME} as {DB_USER}")
-
-        conn = psycopg2.connect(
-            host=DB_HOST,
-            port=DB_PORT,
-            database=DB_NAME,
-            user=DB_USER,
-            password=DB_PASSWORD,
-            cursor_factory=RealDictCursor,
-            connect_timeout=10  # Add connection timeout
-        )
-        logger.info("Database connection successful")
-        return conn
-    except psycopg2.Error as e:
-        logger.error(f"Database connection error: {str(e)}")
-        logger.error(f"Connection details - Host: {DB_HOST}, Port: {DB_PORT}, Database: {DB_NAME}, User: {DB_USER}")
-        raise
+        yield
+    finally:
+        for task in background:
+            task.cancel()
+        await http_client.close_client()
+        await db.close_pool()
+
+
+@asynccontextmanager
+async def session_lifespan(server):
+    """Runs once per connected MCP client session"""
+    # Tool calls of this session run in tasks that inherit the id
+    structured_logging.SESSION_ID.set(uuid.uuid4().hex[:12])
+    metrics.ACTIVE_SESSIONS.inc()
+    try:
+        yield {}
+    finally:
+        metrics.ACTIVE_SESSIONS.dec()
+
+
+async def metrics_endpoint(request):
+    """Prometheus scrape endpoint"""
+    return Response(metrics.REGISTRY.render(), media_type=metrics.CONTENT_TYPE)
+
+
+def create_http_app(transport):
+    """The FastMCP SSE or streamable HTTP app plus the /metrics route"""
+    app = mcp.sse_app() if transport == "sse" else mcp.streamable_http_app()
+    app.router.routes.append(Route("/metrics", endpoint=metrics_endpoint))
+    return app
+
+
+async def run_server(transport):
+    """Run the MCP server inside the process-wide lifespan"""
+    async with server_lifespan():
+        if transport in ("sse", "streamable-http"):
+            config = uvicorn.Config(
+                create_http_app(transport),
+                host=mcp.settings.host,
+                port=mcp.settings.port,
+                log_level=mcp.settings.log_level.lower(),
+                log_config=None,  # keep uvicorn on the queued root handler
+                access_log=structured_logging.LOG_REQUESTS,
+                timeout_graceful_shutdown=SHUTDOWN_DRAIN_TIMEOUT,
+            )
+            await uvicorn.Server(config).serve()
+        else:
+            await mcp.run_stdio_async()
+
+
+def is_error_result(result):
+    """Tools report failures as text in these shapes rather than raising"""
+    return isinstance(result, str) and result.startswith(("Error", "Unexpected error", "❌"))
+
 
-# Create server with lifespan
-mcp = FastMCP(name, logger=logger, port=port)
+def _error_text(e):
+    """Message for a client; timeouts from asyncpg and httpx have an empty str()"""
+    return str(e) or type(e).__name__
 
 
-@mcp.tool()
+def _busy_error(e):
+    return f"Error: {_error_text(e)}. Try again shortly."
+
+
+def _raise_busy(e):
+    raise ToolError(f"{_error_text(e)}. Try again shortly.")
+
+
+def tool(group, idempotent=False, limit=None, **kwargs):
+    """Register an MCP tool with the standard call metrics
+
+    Use instead of @mcp.tool() so every tool is instrumented the same way.
+    Tools of a group missing from MCP_TOOL_GROUPS are not registered.
+    Concurrent identical calls to an `idempotent` tool share one execution;
+    each caller is still counted and logged as its own call. A `limit`
+    Bulkhead bounds how many calls run and wait at once and answers the
+    rest with a busy error. Tools with a structured (non-str) result report
+    failures by raising ToolError, so their busy error is raised too.
+    """
+    def decorator(fn):
+        if group not in MCP_TOOL_GROUPS:
+            return fn
+        if limit is not None:
+            fn = limit.wrap(fn, on_busy=_busy_error if inspect.signature(fn).return_annotation is str else _raise_busy)
+        if idempotent:
+            fn = coalesce(fn, on_shared=lambda name: metrics.TOOL_CALLS_COALESCED.inc(tool=name))
+            kwargs.setdefault("annotations", ToolAnnotations(idempotentHint=True))
+        return mcp.tool(**kwargs)(metrics.instrument_tool(fn, is_error=is_error_result,
+                                                          on_call=structured_logging.log_tool_call))
+    return decorator
+
+
+def resource(uri, group, **kwargs):
+    """Register an MCP resource if its tool group is enabled"""
+    def decorator(fn):
+        if group not in MCP_TOOL_GROUPS:
+            return fn
+        return mcp.resource(uri, **kwargs)(fn)
+    return decorator
+
+
+def structured_text(structured):
+    """Text content sent with a structured result, as set by STRUCTURED_TEXT"""
+    if STRUCTURED_TEXT == "none":
+        return []
+    if STRUCTURED_TEXT == "indented":
+        return [TextContent(type="text", text=json.dumps(structured, ensure_ascii=False, indent=2))]
+    return [TextContent(type="text", text=json.dumps(structured, ensure_ascii=False, separators=(",", ":")))]
+
+
+class _FastMCP(FastMCP):
+    """FastMCP rendering structured tool results as STRUCTURED_TEXT asks"""
+
+    async def call_tool(self, name, arguments):
+        result = await super().call_tool(name, arguments)
+        # Results of primitive type are wrapped as {"result": ...} and keep FastMCP's text
+        if isinstance(result, tuple) and not self._tool_manager.get_tool(name).fn_metadata.wrap_output:
+            result = structured_text(result[1]), result[1]
+        return result
+
+
+# Create server
+mcp = _FastMCP(
+    name,
+    host=host,
+    port=port,
+    lifespan=session_lifespan,
+    stateless_http=MCP_STATELESS_HTTP,
+    json_response=MCP_JSON_RESPONSE,
+)
+
+metrics.DB_POOL.set_function(lambda: {(state,): value for state, value in db.pool_stats().items()})
+
+
+@tool(group="basic", idempotent=True)
 def add(a: int, b: int) -> int:
     """Add two numbers"""
-    logger.info(f"Tool called: add({a}, {b})")
+    logger.debug("Tool called: add(%s, %s)", a, b)
     return a + b
 
 
-@mcp.tool()
+@tool(group="basic")
 def get_secret_word() -> str:
     """Get a random secret word"""
-    logger.info("Tool called: get_secret_word()")
+    logger.debug("Tool called: get_secret_word()")
     return random.choice(["apple", "banana", "cherry"])
 
 
-@mcp.tool()
-def get_current_weather(city: str) -> str:
-    """Get current weather for a city"""
-    logger.info(f"Tool called: get_current_weather({city})")
+def normalize_city(city):
+    """Cache key for a city: trimmed, single-spaced and case-insensitive"""
+    return " ".join(city.split()).lower()
+
+
+def compact_weather(data):
+    """Reduce a wttr.in j1 document to the current conditions and today's range"""
+    current = data["current_condition"][0]
+    area = (data.get("nearest_area") or [{}])[0]
+    today = (data.get("weather") or [{}])[0]
+    location = ", ".join(part[0]["value"] for part in (area.get("areaName"), area.get("country")) if part)
+    return {
+        "location": location or None,
+        "observed_at": current.get("localObsDateTime"),
+        "condition": current["weatherDesc"][0]["value"].strip(),
+        "temp_c": int(current["temp_C"]),
+        "feels_like_c": int(current["FeelsLikeC"]),
+        "humidity_pct": int(current["humidity"]),
+        "wind_kmph": int(current["windspeedKmph"]),
+        "wind_dir": current.get("winddir16Point"),
+        "precip_mm": float(current["precipMM"]),
+        "today_min_c": int(today["mintempC"]) if "mintempC" in today else None,
+        "today_max_c": int(today["maxtempC"]) if "maxtempC" in today else None,
+    }
+
+
+def trim_weather_text(text):
+    """Strip terminal escapes, trailing blanks and the wttr.in footer from a text report"""
+    lines = [line.rstrip() for line in ANSI_ESCAPE.sub("", text).splitlines()]
+    while lines and (not lines[-1] or lines[-1].startswith("Follow ")):
+        lines.pop()
+    return "\n".join(lines)
+
+
+async def fetch_weather(city, weather_format):
+    """Fetch the wttr.in report for a city in one of WEATHER_FORMATS"""
+    # Quoted whole, so "?", "#" or "/" in a name cannot cut off the query string
+    response = await http_client.get(f"{WEATHER_BASE_URL}/{quote(city, safe='')}?{WEATHER_FORMATS[weather_format]}")
+    response.raise_for_status()  # Raise an exception for bad responses
+    if weather_format == "json":
+        return json.dumps(compact_weather(response.json()), ensure_ascii=False)
+    return trim_weather_text(response.text)
+
+
+async def load_weather(city, weather_format):
+    """Report for a city from the cache or wttr.in
+
+    While wttr.in is failing the last known report is returned instead,
+    however old, marked as cached. Raises WEATHER_ERRORS when there is none.
+    """
+    key = (normalize_city(city), weather_format)
+    try:
+        return await weather_cache.get_or_load(key, lambda: fetch_weather(*key))
+    except WEATHER_ERRORS as e:
+        cached = weather_cache.peek(key)
+        if cached is None:
+            raise
+        # Last known report beats an error while wttr.in is down
+        report, age = cached
+        logger.warning("Serving cached weather for %s (%.0fs old): %s", key[0], age, e)
+        if weather_format == "json":
+            return json.dumps({**json.loads(report), "cached_age_s": round(age)}, ensure_ascii=False)
+        return f"{report}\n(Cached report from {age / 60:.0f} min ago; weather service unavailable)"
+
+
+@tool(group="weather", idempotent=True, limit=weather_limit)
+async def get_current_weather(
+    city: str,
+    format: Literal["oneline", "current", "json", "full"] = "oneline",
+) -> str:
+    """Get current weather for a city
+
+    Args:
+        city: City name, e.g. "London" or "New York"
+        format: "oneline" (default) for a single summary line, "current" for
+            the current conditions block, "json" for a compact JSON object, or
+            "full" for the three-day forecast
+
+    Returns:
+        The weather report as plain text, or a JSON object for "json"
+    """
+    logger.debug("Tool called: get_current_weather(%s, format=%s)", city, format)
+
+    if format not in WEATHER_FORMATS:
+        return f"Error: format must be one of {', '.join(WEATHER_FORMATS)}."
 
     try:
-        endpoint = "https://wttr.in"
-        response = requests.get(f"{endpoint}/{city}", timeout=10)
-        response.raise_for_status()  # Raise an exception for bad responses
-        return response.text
-    except requests.RequestException as e:
-        logger.error(f"Error fetching weather data: {str(e)}")
-        return f"Error fetching weather data: {str(e)}"
+        return await load_weather(city, format)
+    except WEATHER_ERRORS as e:
+        logger.error("Error fetching weather data: %s", e)
+        return f"Error fetching weather data: {_error_text(e)}"
 
 
-@mcp.tool()
+@tool(group="weather", idempotent=True, limit=weather_limit)
+async def get_weather_many(
+    cities: list[str],
+    format: Literal["oneline", "current", "json", "full"] = "oneline",
+) -> str:
+    """Get current weather for several cities in one call
+
+    Cities are fetched concurrently; a failure for one city does not affect
+    the others.
+
+    Args:
+        cities: City names, e.g. ["London", "Paris", "New York"]
+        format: Report format for every city, as for get_current_weather
+
+    Returns:
+        One report or error per city, in the order given. For "json", a JSON
+        object keyed by city with an "error" entry for cities that failed.
+    """
+    logger.debug("Tool called: get_weather_many(%s, format=%s)", cities, format)
+
+    if format not in WEATHER_FORMATS:
+        return f"Error: format must be one of {', '.join(WEATHER_FORMATS)}."
+
+    # Duplicates would only fetch the same report twice
+    names = {}
+    for city in cities:
+        if city.strip():
+            names.setdefault(normalize_city(city), " ".join(city.split()))
+    unique = list(names.values())
+    if not unique:
+        return "Error: cities must contain at least one city name."
+    if len(unique) > WEATHER_BATCH_MAX_CITIES:
+        return f"Error: at most {WEATHER_BATCH_MAX_CITIES} cities per call."
+
+    semaphore = asyncio.Semaphore(WEATHER_BATCH_CONCURRENCY)
+
+    async def fetch_one(city):
+        async with semaphore:
+            try:
+                return await load_weather(city, format), None
+            except WEATHER_ERRORS as e:
+                logger.error("Error fetching weather data for %s: %s", city, e)
+                return None, _error_text(e)
+
+    results = await asyncio.gather(*(fetch_one(city) for city in unique))
+    failed = sum(1 for _, error in results if error is not None)
+    if failed == len(unique):
+        errors = "\n".join(f"- {city}: {error}" for city, (_, error) in zip(unique, results))
+        return f"Error fetching weather data for every city:\n{errors}"
+
+    if format == "json":
+        return json.dumps({city: json.loads(report) if error is None else {"error": error}
+                           for city, (report, error) in zip(unique, results)}, ensure_ascii=False)
+    return "\n\n".join(f"=== {city} ===\n{report if error is None else f'Error fetching weather data: {error}'}"
+                        for city, (report, error) in zip(unique, results))
+
+
+@resource("cache://weather/stats", group="weather", mime_type="application/json")
+def weather_cache_stats() -> str:
+    """Hit, miss and eviction counters for the weather cache"""
+    return json.dumps(weather_cache.stats())
+
+
+@tool(group="basic", idempotent=True)
 def get_current_time() -> str:
     """Get current time"""
-    logger.info("Tool called: get_current_time()")
+    logger.debug("Tool called: get_current_time()")
     return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
 
-@mcp.tool()
-def test_database_connection() -> str:
+class DatabaseStatus(BaseModel):
+    """Result of test_database_connection"""
+    connected_as: str
+    server_version: str
+    table_exists: bool
+
+
+class AddedLanguage(Language):
+    """Result of add_coding_language"""
+    created: bool  # False when an existing language was returned
+
+
+class InvalidRow(BaseModel):
+    row: int
+    error: str
+
+
+class BulkAddResult(BaseModel):
+    """Result of add_coding_languages_bulk; rows are numbered from 1 in input order"""
+    added: int
+    submitted: int
+    ids: list[int]
+    conflict_rows: list[int]
+    invalid_rows: list[InvalidRow]
+
+
+class LanguagePage(BaseModel):
+    """One page of list_coding_languages"""
+    languages: list[Language]
+    next_page_token: str | None = None  # set when more rows match; pass it back as page_token
+    cached_age_s: float | None = None  # set when served from cache because the database is unavailable
+
+
+class LanguageMatch(Language):
+    """A search result and why it matched"""
+    match: str  # "prefix" (name starts with the query), "name" (name words), "creator" (creator words) or "fuzzy"
+    score: float  # higher is closer, within one kind of match
+
+
+class LanguageSearch(BaseModel):
+    """search_coding_languages results, best first"""
+    query: str
+    matches: list[LanguageMatch]
+    cached_age_s: float | None = None  # set when served from cache because the database is unavailable
+
+
+class CreatorStats(BaseModel):
+    """Languages by one creator"""
+    creator: str | None
+    static: int
+    dynamic: int
+
+
+class LanguageStats(BaseModel):
+    """coding_language_stats result"""
+    total: int
+    static: int
+    dynamic: int
+    creator_count: int  # creators overall; `creators` holds the largest `limit` of them
+    creators: list[CreatorStats]
+    cached_age_s: float | None = None  # set when served from cache because the database is unavailable
+
+
+def _require_db_password():
+    if not DB_PASSWORD:
+        raise ToolError("Database password not configured. Please set DB_PASSWORD environment variable.")
+
+
+@tool(group="database", idempotent=True, limit=database_limit)
+async def test_database_connection() -> DatabaseStatus:
     """Test database connection and return status info"""
-    logger.info("Tool called: test_database_connection()")
+    logger.debug("Tool called: test_database_connection()")
 
+    connected_as = f"{DB_USER}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-
-        # Test basic connectivity
-        cursor.execute('SELECT version();')
-        version_result = cursor.fetchone()
-
-        # Test if our table exists
-        cursor.execute("""
-            SELECT EXISTS (
-                SELECT FROM information_schema.tables
-                WHERE table_name = 'codingLanguage'
-            );
-        """)
-        table_exists = cursor.fetchone()['exists']
-
-        cursor.close()
-        conn.close()
-
-        result = f"✅ Database Connection: SUCCESS\n"
-        result += f"📝 PostgreSQL Version: {version_result['version']}\n"
-        result += f"📋 codingLanguage table: {'EXISTS' if table_exists else 'MISSING'}\n"
-        result += f"🔗 Connected as: {DB_USER}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+        async with get_db_connection() as conn:
+            # Test basic connectivity
+            version = await language_repository.server_version(conn)
 
-        return result
+            # Table existence is checked once at startup and cached
+            table_exists = await language_repository.table_exists(conn)
 
     except Exception as e:
-        error_msg = f"❌ Database Connection: FAILED\n"
-        error_msg += f"🔗 Attempted: {DB_USER}@{DB_HOST}:{DB_PORT}/{DB_NAME}\n"
-        error_msg += f"❌ Error: {str(e)}"
-        logger.error(f"Database connection test failed: {str(e)}")
-        return error_msg
+        logger.error("Database connection test failed: %s", e)
+        raise ToolError(f"Database connection to {connected_as} failed: {_error_text(e)}")
+
+    return DatabaseStatus(connected_as=connected_as, server_version=version, table_exists=table_exists)
 
 
-@mcp.tool()
-def add_coding_language(name: str, is_static: bool = False, creator: str = "system") -> str:
+@tool(group="database", limit=database_limit)
+async def add_coding_language(
+    name: str,
+    is_static: bool = False,
+    creator: str = "system",
+    idempotent: bool = True,
+    idempotency_key: str | None = None,
+) -> AddedLanguage:
     """Add a new coding language to the database
 
     Args:
         name: Name of the programming language (e.g., 'Python', 'JavaScript')
         is_static: Whether the language is statically typed (default: False)
         creator: Creator/author of the language entry (default: 'system')
+        idempotent: Return the existing language if one with the same name
+            (ignoring case and surrounding spaces) exists (default: True).
+            With False such a name is an error once names are unique, and
+            is added again on databases that still allow duplicates
+        idempotency_key: Optional client-chosen key; retrying with the same
+            key returns the language added by the first call
 
     Returns:
-        Success message with the created language ID
+        The stored language including its ID, and whether this call created it
     """
-    logger.info(f"Tool called: add_coding_language({name}, {is_static}, {creator})")
+    logger.debug("Tool called: add_coding_language(%s, %s, %s, idempotent=%s, idempotency_key=%s)",
+                 name, is_static, creator, idempotent, idempotency_key)
 
-    if not DB_PASSWORD:
-        return "Error: Database password not configured. Please set DB_PASSWORD environment variable."
+    _require_db_password()
+
+    try:
+        async with get_db_connection() as conn:
+            if idempotency_key is not None and not (await language_repository.schema_features(conn))["request_table"]:
+                raise ToolError("idempotency_key needs the dedup migration; run python dedupe_languages.py")
+            record, created = await language_repository.insert_language(conn, name, is_static, creator,
+                                                                        idempotent, idempotency_key)
+
+    except ToolError:
+        raise
+    except asyncpg.UniqueViolationError:
+        raise ToolError(f"A coding language named {name.strip()!r} already exists. "
+                        "Call with idempotent=true to get it instead.")
+    except asyncpg.PostgresError as e:
+        logger.error("Database error while adding coding language: %s", e)
+        raise ToolError(f"Error adding coding language: {_error_text(e)}")
+    except CircuitOpen as e:
+        raise ToolError(f"{_error_text(e)}. Try again shortly.")
+    except Exception as e:
+        logger.error("Unexpected error while adding coding language: %s", e)
+        raise ToolError(f"Unexpected error: {_error_text(e)}")
+
+    language = Language.from_record(record)
+    if created:
+        language_cache.invalidate()
+        logger.info("Successfully added coding language: %s with ID: %s", name, language.id)
+    else:
+        logger.info("Coding language %s already exists with ID: %s", name, language.id)
+    return AddedLanguage(**language.model_dump(), created=created)
+
+
+@tool(group="database", limit=database_limit)
+async def add_coding_languages_bulk(
+    languages: list[LanguageInput] | None = None,
+    payload: str | None = None,
+    payload_format: Literal["json", "jsonl", "csv"] = "jsonl",
+) -> BulkAddResult:
+    """Add many coding languages in a single transaction
+
+    Args:
+        languages: Languages to add, each with name, is_static and creator
+        payload: Alternatively, the languages as text in payload_format
+        payload_format: Format of payload: 'json' (array), 'jsonl' (one object per line)
+            or 'csv' (header row with name,is_static,creator)
+
+    Returns:
+        The generated IDs in input order, conflicting rows and rows that
+        could not be parsed
+    """
+    logger.debug("Tool called: add_coding_languages_bulk(%d languages, %d payload bytes as %s)",
+                 len(languages or []), len(payload or ''), payload_format)
+
+    _require_db_password()
+
+    # Payload rows are numbered after the rows passed in `languages`
+    rows = list(enumerate(languages or [], 1))
+    offset = len(rows)
+    errors = []
+    if payload:
+        try:
+            parsed, parse_errors = parse_language_payload(payload, payload_format)
+        except ValueError as e:
+            raise ToolError(f"Error parsing payload: {_error_text(e)}")
+        rows.extend((offset + row, lang) for row, lang in parsed)
+        errors = [(offset + row, message) for row, message in parse_errors]
+
+    if not rows:
+        raise ToolError("No languages given. Pass 'languages' or a 'payload'.")
+    if len(rows) > BULK_MAX_ROWS:
+        raise ToolError(f"At most {BULK_MAX_ROWS} languages can be added per call, got {len(rows)}.")
 
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-
-                        # Insert new coding language
-        insert_query = """
-            INSERT INTO "codingLanguage" (name, "isStatic", creator)
-            VALUES (%s, %s, %s)
-            RETURNING id;
-        """
-
-        cursor.execute(insert_query, (name, is_static, creator))
-        result = cursor.fetchone()
-        language_id = result['id']
-
-        conn.commit()
-        cursor.close()
-        conn.close()
-
-        logger.info(f"Successfully added coding language: {name} with ID: {language_id}")
-        return f"Successfully added coding language '{name}' with ID: {language_id} (isStatic: {is_static}, creator: {creator})"
-
-    except psycopg2.Error as e:
-        logger.error(f"Database error while adding coding language: {str(e)}")
-        return f"Error adding coding language: {str(e)}"
+        async with get_db_connection() as conn:
+            inserted, conflicts = await language_repository.insert_languages_bulk(conn, rows, BULK_BATCH_SIZE)
+
+    except asyncpg.PostgresError as e:
+        logger.error("Database error while bulk adding coding languages: %s", e)
+        raise ToolError(f"Error adding coding languages: {_error_text(e)}")
+    except CircuitOpen as e:
+        raise ToolError(f"{_error_text(e)}. Try again shortly.")
     except Exception as e:
-        logger.error(f"Unexpected error while adding coding language: {str(e)}")
-        return f"Unexpected error: {str(e)}"
+        logger.error("Unexpected error while bulk adding coding languages: %s", e)
+        raise ToolError(f"Unexpected error: {_error_text(e)}")
+
+    if inserted:
+        language_cache.invalidate()
+    logger.info("Bulk added %d coding languages (%d conflicts, %d invalid)", len(inserted), len(conflicts), len(errors))
+    return BulkAddResult(
+        added=len(inserted),
+        submitted=len(rows) + len(errors),
+        ids=[language_id for _, language_id in inserted],
+        conflict_rows=conflicts,
+        invalid_rows=[InvalidRow(row=row, error=message) for row, message in errors],
+    )
 
 
-@mcp.tool()
-def list_coding_languages() -> str:
-    """List all coding languages from the database
+def encode_page_token(after_id, limit, is_static, creator, name_prefix):
+    """Opaque continuation token carrying the position and filters"""
+    state = {"after_id": after_id, "limit": limit, "is_static": is_static,
+             "creator": creator, "name_prefix": name_prefix}
+    return base64.urlsafe_b64encode(json.dumps(state, separators=(",", ":")).encode()).decode()
+
+
+def decode_page_token(token):
+    state = json.loads(base64.urlsafe_b64decode(token.encode()))
+    if not isinstance(state, dict) or not isinstance(state.get("after_id"), int):
+        raise ValueError("malformed page token")
+    return state
+
+
+def _cached_during_outage(key):
+    """(result, age) cached for `key` to serve while the database breaker is open, or None
+
+    Nothing is served when the cache is disabled or the entry is older than
+    LIST_CACHE_OUTAGE_MAX_AGE.
+    """
+    if LIST_CACHE_MAX_STALENESS <= 0:
+        return None
+    return language_cache.peek(key, max_age=LIST_CACHE_OUTAGE_MAX_AGE)
+
+
+async def load_language_page(after_id, limit, is_static, creator, name_prefix):
+    """Query one page as list_coding_languages returns it"""
+    async with get_db_connection() as conn:
+        # Fetch one extra row to learn whether another page exists. The whole
+        # page is returned in one result, so a cursor would only add round trips;
+        # export_languages.py streams the table instead.
+        records = await language_repository.fetch_languages(conn, after_id, limit + 1, is_static, creator,
+                                                            name_prefix)
+    has_more = len(records) > limit
+    languages = [Language.from_record(lang) for lang in records[:limit]]
+
+    token = encode_page_token(languages[-1].id, limit, is_static, creator, name_prefix) if has_more else None
+    logger.info("Retrieved %d coding languages", len(languages))
+    return LanguagePage(languages=languages, next_page_token=token)
+
+
+@tool(group="database", idempotent=True, limit=database_limit)
+async def list_coding_languages(
+    after_id: int | None = None,
+    limit: int = LIST_DEFAULT_LIMIT,
+    is_static: bool | None = None,
+    creator: str | None = None,
+    name_prefix: str | None = None,
+    page_token: str | None = None,
+) -> LanguagePage:
+    """List coding languages from the database, one page at a time
+
+    Args:
+        after_id: Only return languages with an ID greater than this (keyset pagination)
+        limit: Maximum number of languages to return (default: 100)
+        is_static: Only return statically (True) or dynamically (False) typed languages
+        creator: Only return languages with this exact creator
+        name_prefix: Only return languages whose name starts with this (case-insensitive)
+        page_token: Continuation token from a previous call; overrides the other arguments
 
     Returns:
-        Formatted list of all coding languages with their details
+        The languages on this page, and a next_page_token when more results
+        are available
     """
-    logger.info("Tool called: list_coding_languages()")
+    logger.debug("Tool called: list_coding_languages(after_id=%s, limit=%s, is_static=%s, creator=%s, "
+                 "name_prefix=%s, page_token=%s)", after_id, limit, is_static, creator, name_prefix, page_token)
+
+    _require_db_password()
+
+    if page_token:
+        try:
+            state = decode_page_token(page_token)
+        except (ValueError, TypeError):
+            raise ToolError("Invalid page_token. Start again without one.")
+        after_id = state["after_id"]
+        limit = state.get("limit") or LIST_DEFAULT_LIMIT
+        is_static = state.get("is_static")
+        creator = state.get("creator")
+        name_prefix = state.get("name_prefix")
+
+    if limit < 1 or limit > LIST_MAX_LIMIT:
+        raise ToolError(f"limit must be between 1 and {LIST_MAX_LIMIT}.")
+
+    key = (after_id, limit, is_static, creator, name_prefix)
+    try:
+        if limit > LIST_CACHE_MAX_PAGE:
+            # Pages this large are not kept in memory
+            return await load_language_page(*key)
+        return await language_cache.get_or_load(key, lambda: load_language_page(*key))
+
+    except asyncpg.PostgresError as e:
+        logger.error("Database error while listing coding languages: %s", e)
+        raise ToolError(f"Error retrieving coding languages: {_error_text(e)}")
+    except CircuitOpen as e:
+        cached = _cached_during_outage(key)
+        if cached is not None:
+            page, age = cached
+            logger.warning("Serving cached language page (%.0fs old): %s", age, e)
+            return page.model_copy(update={"cached_age_s": round(age, 1)})
+        raise ToolError(f"{_error_text(e)}. Try again shortly.")
+    except Exception as e:
+        logger.error("Unexpected error while listing coding languages: %s", e)
+        raise ToolError(f"Unexpected error: {_error_text(e)}")
 
-    if not DB_PASSWORD:
-        return "Error: Database password not configured. Please set DB_PASSWORD environment variable."
 
+async def load_search(query, limit):
+    async with get_db_connection() as conn:
+        records = await language_repository.search_languages(conn, query, limit)
+    logger.info("Search for %r matched %d coding languages", query, len(records))
+    return LanguageSearch(query=query, matches=[
+        LanguageMatch(**Language.from_record(record).model_dump(), match=record['match'],
+                      score=round(record['score'], 4))
+        for record in records
+    ])
+
+
+@tool(group="database", idempotent=True, limit=database_limit)
+async def search_coding_languages(query: str, limit: int = SEARCH_DEFAULT_LIMIT) -> LanguageSearch:
+    """Search coding languages by name or creator, best matches first
+
+    Matches names that start with the query, then names or creators that
+    contain all of its words (e.g. "microsoft" finds languages created by
+    Microsoft), then similarly spelled names when the database supports it.
+
+    Args:
+        query: Name, name prefix or creator to look for (case-insensitive)
+        limit: Maximum number of matches to return (default: 20)
+
+    Returns:
+        The matching languages with the kind of match and a score
+    """
+    logger.debug("Tool called: search_coding_languages(query=%s, limit=%s)", query, limit)
+
+    _require_db_password()
+
+    query = " ".join(query.split())
+    if not query:
+        raise ToolError("query must not be empty.")
+    if limit < 1 or limit > SEARCH_MAX_LIMIT:
+        raise ToolError(f"limit must be between 1 and {SEARCH_MAX_LIMIT}.")
+
+    key = ("search", query, limit)
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
+        return await language_cache.get_or_load(key, lambda: load_search(query, limit))
+
+    except asyncpg.PostgresError as e:
+        logger.error("Database error while searching coding languages: %s", e)
+        raise ToolError(f"Error searching coding languages: {_error_text(e)}")
+    except CircuitOpen as e:
+        cached = _cached_during_outage(key)
+        if cached is not None:
+            result, age = cached
+            logger.warning("Serving cached search results (%.0fs old): %s", age, e)
+            return result.model_copy(update={"cached_age_s": round(age, 1)})
+        raise ToolError(f"{_error_text(e)}. Try again shortly.")
+    except Exception as e:
+        logger.error("Unexpected error while searching coding languages: %s", e)
+        raise ToolError(f"Unexpected error: {_error_text(e)}")
 
-        # Get all coding languages
-        select_query = """
-            SELECT id, name, "isStatic", creator
-            FROM "codingLanguage"
-            ORDER BY id;
-        """
 
-        cursor.execute(select_query)
-        languages = cursor.fetchall()
+async def load_stats(limit):
+    async with get_db_connection() as conn:
+        records = await language_repository.language_stats(conn, limit)
+    first = records[0] if records else {"total_static": 0, "total_dynamic": 0, "creators": 0}
+    return LanguageStats(
+        total=first['total_static'] + first['total_dynamic'],
+        static=first['total_static'],
+        dynamic=first['total_dynamic'],
+        creator_count=first['creators'],
+        creators=[CreatorStats(creator=record['creator'], static=record['static'], dynamic=record['dynamic'])
+                  for record in records],
+    )
 
-        cursor.close()
-        conn.close()
 
-        if not languages:
-            return "No coding languages found in the database."
+@tool(group="database", idempotent=True, limit=database_limit)
+async def coding_language_stats(limit: int = STATS_DEFAULT_LIMIT) -> LanguageStats:
+    """Count coding languages: static vs dynamic, overall and per creator
 
-        # Format the results
-        result = "Coding Languages:\n"
-        result += "-" * 50 + "\n"
-        for lang in languages:
-            static_type = "Static" if lang['isStatic'] else "Dynamic"
-            result += f"ID: {lang['id']} | {lang['name']} | Type: {static_type} | Creator: {lang['creator']}\n"
+    The counts are kept up to date in the database as languages are added,
+    so this is cheap however many languages are stored.
 
-        logger.info(f"Retrieved {len(languages)} coding languages")
-        return result
+    Args:
+        limit: Maximum number of creators to list, largest first (default: 100)
+
+    Returns:
+        Total, static and dynamic counts, the number of creators, and the
+        static and dynamic counts of the largest creators
+    """
+    logger.debug("Tool called: coding_language_stats(limit=%s)", limit)
 
-    except psycopg2.Error as e:
-        logger.error(f"Database error while listing coding languages: {str(e)}")
-        return f"Error retrieving coding languages: {str(e)}"
+    _require_db_password()
+
+    if limit < 1 or limit > STATS_MAX_LIMIT:
+        raise ToolError(f"limit must be between 1 and {STATS_MAX_LIMIT}.")
+
+    key = ("stats", limit)
+    try:
+        return await language_cache.get_or_load(key, lambda: load_stats(limit))
+
+    except asyncpg.PostgresError as e:
+        logger.error("Database error while counting coding languages: %s", e)
+        raise ToolError(f"Error counting coding languages: {_error_text(e)}")
+    except CircuitOpen as e:
+        cached = _cached_during_outage(key)
+        if cached is not None:
+            result, age = cached
+            logger.warning("Serving cached language stats (%.0fs old): %s", age, e)
+            return result.model_copy(update={"cached_age_s": round(age, 1)})
+        raise ToolError(f"{_error_text(e)}. Try again shortly.")
     except Exception as e:
-        logger.error(f"Unexpected error while listing coding languages: {str(e)}")
-        return f"Unexpected error: {str(e)}"
+        logger.error("Unexpected error while counting coding languages: %s", e)
+        raise ToolError(f"Unexpected error: {_error_text(e)}")
+
+
+@resource("cache://languages/stats", group="database", mime_type="application/json")
+def language_cache_stats() -> str:
+    """Hit, miss and invalidation counters for the coding language listing cache"""
+    return json.dumps(language_cache.stats())
 
 if __name__ == "__main__":
-    # Determine transport based on environment
-    # If running in a web environment (PORT set), use SSE
-    # If running locally/CLI, use stdio
+    # uvicorn re-raises SIGTERM once it has drained; exit normally instead so
+    # the lifespan cleanup runs and queued log records are written out
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+
+    # MCP_TRANSPORT picks the transport; without it a web environment
+    # (PORT set) uses SSE and a local/CLI run uses stdio
     try:
-        if os.environ.get('PORT'):
-            logger.info(f"Starting MCP Server with SSE transport on port {port}...")
-            mcp.run(transport="sse")
+        if MCP_TRANSPORT not in ("sse", "streamable-http", "stdio"):
+            raise ValueError(f"Unknown MCP_TRANSPORT: {MCP_TRANSPORT}")
+        if MCP_TRANSPORT != "stdio" and MCP_WORKERS > 1:
+            logger.info("Starting MCP Server with %s transport on port %d across %d workers...", MCP_TRANSPORT, port, MCP_WORKERS)
+            multiworker.run(MCP_WORKERS, host, port, SHUTDOWN_DRAIN_TIMEOUT, log_level=mcp.settings.log_level.lower())
+        elif MCP_TRANSPORT != "stdio":
+            logger.info("Starting MCP Server with %s transport on port %d...", MCP_TRANSPORT, port)
+            anyio.run(run_server, MCP_TRANSPORT)
         else:
             logger.info("Starting MCP Server with stdio transport...")
-            mcp.run(transport="stdio")
+            anyio.run(run_server, "stdio")
     except Exception as e:
-        logger.error(f"Server error: {str(e)}")
+        logger.error("Server error: %s", e)
         sys.exit(1)
     finally:
         logger.info("Server terminated")
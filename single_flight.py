@@ -0,0 +1,68 @@
+"""
+Single-flight execution for idempotent tools
+
+Concurrent calls to the same tool with the same arguments share one
+execution: the first call runs, later ones wait for its result (or its
+exception) instead of repeating the work. Nothing is kept once the call
+finishes, so this only merges calls that overlap in time.
+"""
+import asyncio
+import functools
+import inspect
+import json
+
+
+class SingleFlight:
+    """Share one in-flight call among concurrent callers with the same key"""
+
+    def __init__(self):
+        self._inflight = {}
+
+    def __len__(self):
+        return len(self._inflight)
+
+    async def do(self, key, fn):
+        """Return (await fn(), shared), joining a running call for `key` if any"""
+        task = self._inflight.get(key)
+        shared = task is not None
+        if not shared:
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # Shield so one cancelled caller does not cancel the call for the others
+        return await asyncio.shield(task), shared
+
+
+def call_key(signature, args, kwargs):
+    """Arguments normalized so f(1), f(a=1) and f() with default a=1 match"""
+    bound = signature.bind(*args, **kwargs)
+    bound.apply_defaults()
+    return json.dumps(bound.arguments, sort_keys=True, default=repr)
+
+
+def coalesce(fn, on_shared=None):
+    """Wrap a tool so identical concurrent calls run once
+
+    The wrapper is async and keeps the signature of `fn`. `on_shared(tool)`
+    is called for every call answered by another one already in flight.
+    """
+    tool = fn.__name__
+    signature = inspect.signature(fn)
+    flight = SingleFlight()
+
+    async def run(args, kwargs):
+        result = fn(*args, **kwargs)
+        if inspect.isawaitable(result):
+            result = await result
+        return result
+
+    @functools.wraps(fn)
+    async def wrapper(*args, **kwargs):
+        key = call_key(signature, args, kwargs)
+        result, shared = await flight.do(key, lambda: run(args, kwargs))
+        if shared and on_shared is not None:
+            on_shared(tool)
+        return result
+
+    wrapper.single_flight = flight
+    return wrapper
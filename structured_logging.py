@@ -0,0 +1,148 @@
+"""
+Non-blocking, structured logging for the MCP server
+
+Records are put on a bounded queue by the calling thread and formatted and
+written by a background QueueListener, so the event loop never waits on
+stderr. Messages are formatted there as well, so %-style arguments cost
+nothing until a record is actually written. When the queue is full,
+records are dropped and counted rather than blocking the caller.
+
+Every tool call produces one "tool call" record with the tool name,
+duration, outcome and session id. Successful calls are sampled per tool
+(LOG_SAMPLE_RATES); failures are always logged.
+"""
+import atexit
+import contextvars
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+from datetime import datetime, timezone
+
+from metrics import LOG_RECORDS_DROPPED
+
+# Logging configuration
+LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO').upper()
+LOG_FORMAT = os.environ.get('LOG_FORMAT', 'json')  # 'json' (one object per line) or 'text'
+LOG_QUEUE_SIZE = int(os.environ.get('LOG_QUEUE_SIZE', 10000))  # records buffered before new ones are dropped
+LOG_SAMPLE_RATE = float(os.environ.get('LOG_SAMPLE_RATE', 1.0))  # share of successful tool calls logged
+LOG_SAMPLE_RATES = os.environ.get('LOG_SAMPLE_RATES', '')  # per-tool overrides, e.g. "add=0.01,get_current_time=0"
+LOG_REQUESTS = os.environ.get('LOG_REQUESTS', 'false').lower() == 'true'  # keep the per-request lines of uvicorn and the MCP SDK
+
+# Loggers writing an unsampled INFO line for every request, which the
+# "tool call" record already covers
+REQUEST_LOGGERS = ("uvicorn.access", "mcp.server.lowlevel.server")
+
+# Set by the session lifespan; tool calls run in tasks that inherit it
+SESSION_ID = contextvars.ContextVar("session_id", default=None)
+
+tool_logger = logging.getLogger("demo-mcp-server.tools")
+
+# Attributes every LogRecord has; anything else was passed through `extra`
+_STANDARD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+_IGNORED_ATTRIBUTES = {"color_message"}  # uvicorn's ANSI-coloured copy of the message
+
+_listener = None
+
+
+def parse_sample_rates(value):
+    """Parse "tool=rate,tool=rate" into a dict"""
+    rates = {}
+    for item in value.split(","):
+        if not item.strip():
+            continue
+        tool, _, rate = item.partition("=")
+        rates[tool.strip()] = float(rate)
+    return rates
+
+
+_sample_rates = parse_sample_rates(LOG_SAMPLE_RATES)
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record, including fields passed via `extra`"""
+
+    def format(self, record):
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _STANDARD_ATTRIBUTES and key not in _IGNORED_ATTRIBUTES and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class _DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that defers formatting and never blocks"""
+
+    def prepare(self, record):
+        # The stock handler formats here, on the caller's thread; the
+        # listener formats instead. Arguments must not be mutated afterwards.
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            LOG_RECORDS_DROPPED.inc()
+
+
+def configure_logging():
+    """Route all logging through the background writer (idempotent)"""
+    global _listener
+    if _listener is not None:
+        return
+
+    output = logging.StreamHandler(sys.stderr)
+    if LOG_FORMAT == "json":
+        output.setFormatter(JsonFormatter())
+    else:
+        output.setFormatter(logging.Formatter('%(name)s - %(levelname)s - %(message)s'))
+
+    records = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+    root = logging.getLogger()
+    root.handlers[:] = [_DroppingQueueHandler(records)]
+    root.setLevel(LOG_LEVEL)
+    if not LOG_REQUESTS:
+        for name in REQUEST_LOGGERS:
+            logging.getLogger(name).setLevel(logging.WARNING)
+
+    _listener = logging.handlers.QueueListener(records, output, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_logging)
+
+
+def stop_logging():
+    """Write out queued records and stop the background writer"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def log_tool_call(tool, duration, outcome):
+    """Emit the per-call record; successful calls are sampled"""
+    if not tool_logger.isEnabledFor(logging.INFO):
+        return
+    rate = _sample_rates.get(tool, LOG_SAMPLE_RATE)
+    if outcome == "ok" and (rate <= 0 or (rate < 1 and random.random() >= rate)):
+        return
+    tool_logger.log(
+        logging.INFO if outcome == "ok" else logging.WARNING,
+        "tool call",
+        extra={
+            "tool": tool,
+            "duration_ms": round(duration * 1000, 3),
+            "outcome": outcome,
+            "session_id": SESSION_ID.get(),
+            "sample_rate": rate if outcome == "ok" else 1.0,
+        },
+    )
@@ -7,6 +7,9 @@ import psycopg2
 from psycopg2.extras import RealDictCursor
 from dotenv import load_dotenv
 
+# Same configuration as server.py (DB_HOST, DB_PORT, DB_NAME, DB_USER)
+from db import DB_HOST, DB_PORT, DB_NAME, DB_USER
+
 # Load environment variables from .env file
 load_dotenv()
 
@@ -23,12 +26,6 @@ def test_database_connection():
         print("Please set it with: export DB_PASSWORD='your_password'")
         return False
 
-    # Database configuration (matching server.py) - Using external connection
-    DB_HOST = 'northamerica-northeast1-001.proxy.kinsta.app'
-    DB_PORT = '30888'
-    DB_NAME = 'spiritual-orange-blackbird'
-    DB_USER = 'marmoset'
-
     print(f"Host: {DB_HOST}")
     print(f"Port: {DB_PORT}")
     print(f"Database: {DB_NAME}")
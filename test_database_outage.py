@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Check the database breaker against a server that accepts connections but never replies
+
+Starts a TCP listener on loopback that accepts every connection and never
+answers, points db.py at it with a short connect timeout, and checks that
+concurrent callers share one failed connect attempt, that the breaker opens,
+and that later calls fail at once with CircuitOpen. Needs no database.
+
+Usage:
+    python test_database_outage.py
+    python -m pytest test_database_outage.py
+"""
+import asyncio
+import time
+
+import circuit_breaker
+import db
+
+CONNECT_TIMEOUT = 0.5
+CALLERS = 8
+
+
+async def _silent_server():
+    """A listener that accepts connections and never replies"""
+    async def hold(reader, writer):
+        await reader.read()  # until the client gives up
+        writer.close()
+
+    return await asyncio.start_server(hold, "127.0.0.1", 0)
+
+
+async def _borrow():
+    async with db.get_db_connection():
+        pass
+
+
+async def _run():
+    """(seconds for CALLERS concurrent calls, their errors, breaker state, seconds for the next call, its error)"""
+    server = await _silent_server()
+    saved = db.DB_HOST, db.DB_PORT, db.DB_CONNECT_TIMEOUT, db.breaker
+    db.DB_HOST, db.DB_PORT = "127.0.0.1", str(server.sockets[0].getsockname()[1])
+    db.DB_CONNECT_TIMEOUT = CONNECT_TIMEOUT
+    db.breaker = circuit_breaker.CircuitBreaker("database")
+    try:
+        start = time.perf_counter()
+        errors = await asyncio.gather(*(_borrow() for _ in range(CALLERS)), return_exceptions=True)
+        concurrent = time.perf_counter() - start
+        state = db.breaker.state
+
+        start = time.perf_counter()
+        try:
+            await _borrow()
+            error = None
+        except Exception as e:
+            error = e
+        return concurrent, errors, state, time.perf_counter() - start, error
+    finally:
+        await db.close_pool()
+        db.DB_HOST, db.DB_PORT, db.DB_CONNECT_TIMEOUT, db.breaker = saved
+        server.close()
+
+
+def check_database_outage():
+    print("🔌 Database Outage Check")
+    print("=" * 40)
+
+    concurrent, errors, state, after, error = asyncio.run(_run())
+    print(f"{CALLERS} concurrent calls failed after {concurrent:.2f}s "
+          f"({', '.join(sorted({type(e).__name__ for e in errors}))})")
+    print(f"Breaker: {state}")
+    print(f"Next call failed after {after * 1000:.1f}ms ({type(error).__name__})")
+
+    ok = (concurrent < 2 * CONNECT_TIMEOUT and all(isinstance(e, asyncio.TimeoutError) for e in errors)
+          and state == circuit_breaker.OPEN and isinstance(error, circuit_breaker.CircuitOpen))
+    print("\n✅ The breaker opened after one shared connect timeout" if ok else
+          "\n❌ Callers waited for separate connect attempts or the breaker stayed closed")
+    return ok
+
+
+def test_database_outage():
+    """pytest entry point"""
+    concurrent, errors, state, after, error = asyncio.run(_run())
+    assert all(isinstance(e, asyncio.TimeoutError) for e in errors), errors
+    assert concurrent < 2 * CONNECT_TIMEOUT, f"{CALLERS} callers took {concurrent:.2f}s"
+    assert state == circuit_breaker.OPEN
+    assert isinstance(error, circuit_breaker.CircuitOpen), error
+    assert after < CONNECT_TIMEOUT
+
+
+def test_consecutive_failures():
+    """One caller at a time opens the breaker without filling the window"""
+    breaker = circuit_breaker.CircuitBreaker("test", min_calls=100, consecutive_failures=3)
+
+    async def fail():
+        raise OSError("unreachable")
+
+    async def run():
+        for _ in range(3):
+            try:
+                await breaker.call(fail)
+            except OSError:
+                pass
+
+    asyncio.run(run())
+    assert breaker.state == circuit_breaker.OPEN
+
+
+if __name__ == "__main__":
+    raise SystemExit(0 if check_database_outage() else 1)
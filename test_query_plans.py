@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Check that the tool queries use indexes on a large "codingLanguage" table
+
+Applies pending migrations, seeds the table with generated rows, runs
+ANALYZE, and EXPLAINs every query the tools send. Fails if any plan reads
+"codingLanguage" with a sequential scan. The seed rows are inserted in a
+transaction that is rolled back, so the table is left unchanged.
+
+Usage:
+    python local_services.py -- python test_query_plans.py
+    DB_PASSWORD=... python test_query_plans.py [--rows 200000]
+    python local_services.py -- python -m pytest test_query_plans.py
+"""
+import argparse
+import asyncio
+import json
+
+import db
+import language_repository as repo
+import migrations
+
+# Mostly "import" rows, so filtering on the rare creator or on a name prefix
+# is only cheap with an index
+SEED_LANGUAGES = """
+    INSERT INTO "codingLanguage" (name, "isStatic", creator)
+    SELECT 'plan-check-' || g, g % 2 = 0, CASE WHEN g % 1000 = 0 THEN 'plan-check' ELSE 'import' END
+    FROM generate_series(1, $1) AS g;
+"""
+
+
+def _queries(max_id):
+    """(label, sql, args) for every query the tools send"""
+    page = repo.LIST_DEFAULT_LIMIT + 1  # the tool fetches one row more to detect a next page
+    filters = [
+        ("first page", {}),
+        ("page after id", {"after_id": max_id // 2}),
+        ("creator", {"creator": "plan-check"}),
+        ("isStatic", {"is_static": True}),
+        ("name prefix", {"name_prefix": "plan-check-1234"}),
+        ("creator + isStatic", {"creator": "plan-check", "is_static": False}),
+        ("creator + name prefix", {"creator": "plan-check", "name_prefix": "plan-check-5"}),
+        ("all filters, after id", {"after_id": max_id // 2, "creator": "plan-check", "is_static": True,
+                                   "name_prefix": "plan-check-9"}),
+    ]
+    queries = []
+    for label, kwargs in filters:
+        query, args = repo.build_language_query(limit=page, **kwargs)
+        queries.append((f"list: {label}", query, args))
+    queries.append(("lookup by name", repo.SELECT_LANGUAGE_BY_NAME, ["Plan-Check-42 "]))
+    for label, query in [("search: name", "plan-check-42"), ("search: creator", "plan check")]:
+        sql, args = repo.build_search_query(query, repo.SEARCH_DEFAULT_LIMIT)
+        queries.append((label, sql, args))
+    queries.append(("idempotent insert", repo.INSERT_LANGUAGE_IDEMPOTENT, ["plan-check-42", False, "plan-check"]))
+    return queries
+
+
+def table_scans(plan, table="codingLanguage"):
+    """How each node of an EXPLAIN (FORMAT JSON) plan reads `table`, e.g. "Index Scan using ..." """
+    found = []
+    if plan.get("Relation Name") == table:
+        index = plan.get("Index Name")
+        found.append(f"{plan['Node Type']} using {index}" if index else plan["Node Type"])
+    for child in plan.get("Plans", []):
+        found += table_scans(child, table)
+    return found
+
+
+async def _run(rows):
+    try:
+        async with db.get_db_connection() as conn:
+            await migrations.migrate(conn)
+            transaction = conn.transaction()
+            await transaction.start()
+            try:
+                await conn.execute(SEED_LANGUAGES, rows)
+                await conn.execute('ANALYZE "codingLanguage";')
+                max_id = await conn.fetchval('SELECT max(id) FROM "codingLanguage";')
+                results = []
+                for label, query, args in _queries(max_id):
+                    explained = await conn.fetchval("EXPLAIN (FORMAT JSON) " + query.rstrip().rstrip(";"), *args)
+                    plan = json.loads(explained)[0]["Plan"]
+                    results.append((label, table_scans(plan)))
+                return results
+            finally:
+                await transaction.rollback()
+    finally:
+        await db.close_pool()
+
+
+def check_query_plans(rows=200_000):
+    print("🔍 Query Plan Check")
+    print("=" * 40)
+
+    if not db.DB_PASSWORD:
+        print("❌ DB_PASSWORD not configured")
+        return False
+
+    try:
+        results = asyncio.run(_run(rows))
+    except Exception as e:
+        print(f"❌ Database error: {str(e)}")
+        return False
+
+    print(f"Seeded {rows} rows\n")
+    failed = 0
+    for label, scans in results:
+        if "Seq Scan" in scans:
+            failed += 1
+            print(f"❌ {label:<28} {', '.join(scans)}")
+        else:
+            print(f"✅ {label:<28} {', '.join(scans)}")
+
+    if failed:
+        print(f"\n❌ {failed} of {len(results)} queries fall back to a sequential scan")
+        return False
+    print(f"\n✅ All {len(results)} queries use indexes")
+    return True
+
+
+def test_query_plans():
+    """pytest entry point; skipped without a database"""
+    import pytest
+
+    if not db.DB_PASSWORD:
+        pytest.skip("DB_PASSWORD not configured")
+    for label, scans in asyncio.run(_run(200_000)):
+        assert "Seq Scan" not in scans, f"{label}: sequential scan on codingLanguage ({', '.join(scans)})"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=200_000, help="rows to seed before planning")
+    args = parser.parse_args()
+    raise SystemExit(0 if check_query_plans(args.rows) else 1)